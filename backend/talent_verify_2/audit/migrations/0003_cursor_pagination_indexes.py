@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0002_bulk_rollback_action'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['-timestamp', 'id'], name='audit_audit_timesta_641e1c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='securityevent',
+            index=models.Index(fields=['-timestamp', 'id'], name='audit_secur_timesta_b1a108_idx'),
+        ),
+    ]
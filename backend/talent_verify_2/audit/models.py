@@ -14,6 +14,7 @@ class AuditLog(models.Model):
         ('LOGIN', 'Login'),
         ('LOGOUT', 'Logout'),
         ('BULK_IMPORT', 'Bulk Import'),
+        ('BULK_ROLLBACK', 'Bulk Rollback'),
     ]
     
     # What was changed
@@ -52,6 +53,7 @@ class AuditLog(models.Model):
             models.Index(fields=['content_type', 'object_id']),
             models.Index(fields=['action', 'timestamp']),
             models.Index(fields=['table_name', 'record_id']),
+            models.Index(fields=['-timestamp', 'id']),
         ]
     
     def __str__(self):
@@ -134,6 +136,7 @@ class SecurityEvent(models.Model):
             models.Index(fields=['severity', 'is_resolved']),
             models.Index(fields=['user', 'timestamp']),
             models.Index(fields=['ip_address', 'timestamp']),
+            models.Index(fields=['-timestamp', 'id']),
         ]
     
     def __str__(self):
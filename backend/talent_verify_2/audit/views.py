@@ -7,6 +7,7 @@ from datetime import timedelta
 from .models import AuditLog, SecurityEvent
 from .serializers import AuditLogSerializer, SecurityEventSerializer
 from authentication.permissions import RoleBasedPermission
+from talent_verify_2.pagination import HybridCursorPagination
 
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for audit logs - read-only"""
@@ -15,6 +16,8 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_fields = ['action', 'user', 'content_type']
     search_fields = ['description', 'user__username']
     ordering = ['-timestamp']
+    pagination_class = HybridCursorPagination
+    cursor_ordering = ('-timestamp', 'id')
 
     def get_queryset(self):
         # Only talent verify admins can see all audit logs
@@ -87,6 +90,8 @@ class SecurityEventViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_fields = ['event_type', 'severity', 'is_resolved']
     search_fields = ['description', 'user__username']
     ordering = ['-timestamp']
+    pagination_class = HybridCursorPagination
+    cursor_ordering = ('-timestamp', 'id')
 
     def get_queryset(self):
         # Only admins can see security events
@@ -0,0 +1,129 @@
+from contextlib import contextmanager
+from time import perf_counter
+from django.db import connection
+import math
+import os
+
+def current_rss_kb():
+    """Resident set size of this process right now in KB, or None where /proc is not available"""
+    try:
+        with open('/proc/self/statm') as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+class JobMetrics:
+    """Collect per-stage timings and resource usage for a bulk upload job"""
+
+    STAGES = ['read', 'validate', 'resolve', 'encrypt', 'write', 'audit']
+
+    def __init__(self):
+        self.stage_seconds = {stage: 0.0 for stage in self.STAGES}
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.chunk_count = 0
+        self.rows = 0
+        self.worker_peak_rss_kb = None
+        self.sampled_peak_rss_kb = current_rss_kb()
+        self.started = perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of work and add it to the given stage"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds[name] += perf_counter() - start
+
+    @contextmanager
+    def capture_queries(self):
+        """Count queries and database time issued on the default connection"""
+        with connection.execute_wrapper(self._record_query):
+            yield
+
+    def _record_query(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_seconds += perf_counter() - start
+
+    def merge(self, other):
+        """Add the metrics document of a shard worker to these metrics"""
+        if not other:
+            return
+        for stage, seconds in other.get('stages', {}).items():
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+        self.db_queries += other.get('db_queries', 0)
+        self.db_seconds += other.get('db_seconds', 0.0)
+        self.chunk_count += other.get('chunk_count', 0)
+        self.rows += other.get('rows', 0)
+        if other.get('peak_rss_kb'):
+            self.worker_peak_rss_kb = max(self.worker_peak_rss_kb or 0, other['peak_rss_kb'])
+
+    def sample_rss(self):
+        """Record the current resident set size; called after every chunk"""
+        rss = current_rss_kb()
+        if rss is not None:
+            self.sampled_peak_rss_kb = max(self.sampled_peak_rss_kb or 0, rss)
+
+    def peak_rss_kb(self):
+        """
+        Largest resident set size sampled during this job, including shard
+        workers, in KB. ru_maxrss is not used: it is the peak over the whole
+        life of the process, so a long-lived worker would report the largest
+        job it ever ran.
+        """
+        self.sample_rss()
+        peaks = [peak for peak in (self.sampled_peak_rss_kb, self.worker_peak_rss_kb) if peak is not None]
+        return max(peaks) if peaks else None
+
+    def as_dict(self):
+        total_seconds = perf_counter() - self.started
+        return {
+            'stages': {stage: round(seconds, 4) for stage, seconds in self.stage_seconds.items()},
+            'total_seconds': round(total_seconds, 4),
+            'rows': self.rows,
+            'rows_per_second': round(self.rows / total_seconds, 2) if total_seconds > 0 else 0,
+            'db_queries': self.db_queries,
+            'db_seconds': round(self.db_seconds, 4),
+            'peak_rss_kb': self.peak_rss_kb(),
+            'chunk_count': self.chunk_count,
+        }
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+def summarize_metrics(metrics_list, percentiles=(50, 90, 99)):
+    """Aggregate job metrics documents into percentiles per stage and counter"""
+    series = {f'stages.{stage}': [] for stage in JobMetrics.STAGES}
+    for key in ['total_seconds', 'rows_per_second', 'db_queries', 'db_seconds', 'peak_rss_kb']:
+        series[key] = []
+
+    job_count = 0
+    for metrics in metrics_list:
+        if not metrics:
+            continue
+        job_count += 1
+        for stage, seconds in metrics.get('stages', {}).items():
+            if f'stages.{stage}' in series:
+                series[f'stages.{stage}'].append(seconds)
+        for key in series:
+            if not key.startswith('stages.') and metrics.get(key) is not None:
+                series[key].append(metrics[key])
+
+    return {
+        'job_count': job_count,
+        'percentiles': {
+            key: {f'p{pct}': percentile(values, pct) for pct in percentiles}
+            for key, values in series.items()
+        },
+    }
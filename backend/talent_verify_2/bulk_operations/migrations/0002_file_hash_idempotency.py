@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulk_operations', '0001_initial'),
+        ('companies', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkuploadjob',
+            name='file_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='bulkuploadjob',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='bulkuploadjob',
+            index=models.Index(fields=['file_hash', 'company', 'operation_type', 'created_at'], name='bulk_operat_file_ha_bb468a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bulkuploadjob',
+            index=models.Index(fields=['created_by', 'idempotency_key'], name='bulk_operat_created_c7d81b_idx'),
+        ),
+    ]
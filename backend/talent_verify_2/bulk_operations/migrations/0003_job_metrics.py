@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulk_operations', '0002_file_hash_idempotency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkuploadjob',
+            name='metrics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulk_operations', '0004_archive_sub_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bulkuploadjob',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed'), ('partial', 'Partially Completed'), ('rolled_back', 'Rolled Back')], default='pending', max_length=20),
+        ),
+    ]
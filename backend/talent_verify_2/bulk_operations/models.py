@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Sum
 from users.models import User
 from companies.models import Company
 import uuid
@@ -10,6 +11,7 @@ class BulkUploadJob(models.Model):
         ('completed', 'Completed'),
         ('failed', 'Failed'),
         ('partial', 'Partially Completed'),
+        ('rolled_back', 'Rolled Back'),
     ]
     
     OPERATION_CHOICES = [
@@ -28,6 +30,12 @@ class BulkUploadJob(models.Model):
     success_records = models.PositiveIntegerField(default=0)
     error_records = models.PositiveIntegerField(default=0)
     error_details = models.JSONField(default=list)
+    file_hash = models.CharField(max_length=64, blank=True)  # SHA-256 of the uploaded file
+    idempotency_key = models.CharField(max_length=255, blank=True)
+    metrics = models.JSONField(default=dict, blank=True)  # Per-stage timings and resource usage
+    # Files inside a zip upload are processed as sub-jobs of the upload's job
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='sub_jobs')
+    archive_member = models.CharField(max_length=500, blank=True)
     progress_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     company = models.ForeignKey(Company, on_delete=models.CASCADE, null=True, blank=True)
@@ -37,7 +45,39 @@ class BulkUploadJob(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['file_hash', 'company', 'operation_type', 'created_at']),
+            models.Index(fields=['created_by', 'idempotency_key']),
+        ]
     
     def __str__(self):
         return f"{self.operation_type} - {self.status} ({self.progress_percentage}%)"
 
+    def refresh_from_sub_jobs(self):
+        """Roll the counters of all sub-jobs up into this job"""
+        totals = self.sub_jobs.aggregate(
+            total=Sum('total_records'),
+            processed=Sum('processed_records'),
+            success=Sum('success_records'),
+            errors=Sum('error_records'),
+        )
+        total = totals['total'] or 0
+        processed = totals['processed'] or 0
+        BulkUploadJob.objects.filter(pk=self.pk).update(
+            total_records=total,
+            processed_records=processed,
+            success_records=totals['success'] or 0,
+            error_records=totals['errors'] or 0,
+            progress_percentage=min(processed / total * 100, 100) if total > 0 else 0,
+        )
+
+
+    def clear_sub_jobs(self):
+        """Delete the sub-jobs, re-tagging the rows they imported so rolling back this job still removes them"""
+        sub_job_ids = list(self.sub_jobs.values_list('pk', flat=True))
+        if not sub_job_ids:
+            return
+        for relation in ('created_companies', 'created_departments', 'created_employees', 'created_positions'):
+            related_model = self._meta.get_field(relation).related_model
+            related_model.objects.filter(bulk_job__in=sub_job_ids).update(bulk_job=self)
+        self.sub_jobs.all().delete()
@@ -1,29 +1,68 @@
 import pandas as pd
 import csv
+import gzip
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from typing import List, Dict, Any, Tuple
 from django.core.exceptions import ValidationError
-from django.db import transaction
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.db.models import ExpressionWrapper, F
+from django.db.models.functions import Least
 from companies.models import Company, Department
+from companies.versions import bump_company_versions
 from employees.models import Employee, EmployeePosition
+from employees.encryption import init_worker, worker_settings
+from employees.rollups import defer_rollups, rebuild_rollups
+from audit.models import AuditLog
 from .models import BulkUploadJob
+from .metrics import JobMetrics
+from .sharding import ByteRangeFile, plan_shards, run_shard
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+def file_format(file_name: str) -> str:
+    """Detect the upload format from a file name"""
+    name = file_name.lower()
+    if name.endswith('.csv.gz'):
+        return 'csv.gz'
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.xlsx', '.xls')):
+        return 'excel'
+    if name.endswith('.zip'):
+        return 'zip'
+    raise ValueError("Unsupported file format")
+
 class BulkUploadProcessor:
     """Base class for bulk upload operations"""
     
+    label = 'Bulk upload'
+    SEED_COLUMNS = []
+    
     def __init__(self, job: BulkUploadJob):
         self.job = job
         self.errors = []
         self.success_count = 0
+        self.metrics = JobMetrics()
+        self.chunk_size = settings.BULK_UPLOAD_CHUNK_SIZE
+        # Number of the last row processed (imported or failed), so an
+        # interrupted shard can report how far it got
+        self.last_row_number = None
 
     def update_progress(self, processed: int, total: int):
         """Update job progress"""
         self.job.processed_records = processed
-        self.job.progress_percentage = (processed / total * 100) if total > 0 else 0
+        self.job.progress_percentage = min(processed / total * 100, 100) if total > 0 else 0
         self.job.save(update_fields=['processed_records', 'progress_percentage'])
+        if self.job.parent_id:
+            self.job.parent.refresh_from_sub_jobs()
     
     def add_error(self, row_number: int, field: str, error: str):
         """Add error to the job"""
@@ -33,12 +72,212 @@ class BulkUploadProcessor:
             'error': error
         })
 
+    @contextmanager
+    def open_source(self, file_path: str):
+        """Open the upload as a binary stream, decompressing on the fly"""
+        if self.job.archive_member:
+            with zipfile.ZipFile(file_path) as archive, archive.open(self.job.archive_member) as member:
+                yield member
+        elif file_format(file_path) == 'csv.gz':
+            with gzip.open(file_path, 'rb') as f:
+                yield f
+        else:
+            with open(file_path, 'rb') as f:
+                yield f
+
+    def count_rows(self, file_path: str) -> int:
+        """Count data rows without loading the file into memory"""
+        if file_format(self.job.archive_member or file_path) in ('csv', 'csv.gz'):
+            with self.open_source(file_path) as f:
+                text = io.TextIOWrapper(f, encoding='utf-8', newline='')
+                return max(sum(1 for _ in csv.reader(text)) - 1, 0)
+        return 0
+
+    def read_chunks(self, file_path: str):
+        """Yield the file as DataFrames of at most chunk_size rows"""
+        source_format = file_format(self.job.archive_member or file_path)
+        with self.open_source(file_path) as f:
+            if source_format in ('csv', 'csv.gz'):
+                yield from pd.read_csv(f, chunksize=self.chunk_size)
+            elif source_format == 'excel':
+                # Excel files cannot be streamed, slice them after reading
+                df = pd.read_excel(f)
+                for start in range(0, len(df), self.chunk_size):
+                    yield df.iloc[start:start + self.chunk_size]
+            else:
+                raise ValueError("Unsupported file format")
+
+    def process_row(self, row_number: int, row_data: pd.Series):
+        raise NotImplementedError
+
+    def build_seed(self, seed_values: dict) -> dict:
+        """Resolve shared lookups once before the file is sharded"""
+        return {}
+
+    def load_seed(self, seed: dict):
+        """Load lookups resolved by the parent process"""
+        pass
+
+    def process_chunks(self, chunks, row_offset: int, on_chunk):
+        """Process DataFrame chunks row by row, calling on_chunk(rows) after each chunk"""
+        processed = 0
+        while True:
+            with self.metrics.stage('read'):
+                df = next(chunks, None)
+            if df is None:
+                break
+            self.metrics.chunk_count += 1
+            
+            # Process each row; analytics rollups are rebuilt once at the end
+            with defer_rollups():
+                for index, row in df.iterrows():
+                    row_number = index + row_offset
+                    try:
+                        self.process_row(row_number, row)
+                        self.success_count += 1
+                    except Exception as e:
+                        self.add_error(row_number, 'general', str(e))
+                    self.last_row_number = row_number
+            
+            processed += len(df)
+            on_chunk(len(df))
+            self.metrics.sample_rss()
+        
+        self.metrics.rows += processed
+        return processed
+
+    def should_shard(self, file_path: str) -> bool:
+        """Large plain CSV files are split across worker processes"""
+        return (
+            not self.job.archive_member
+            and file_format(file_path) == 'csv'
+            and settings.BULK_UPLOAD_SHARD_WORKERS > 1
+            and os.path.getsize(file_path) >= settings.BULK_UPLOAD_SHARD_MIN_BYTES
+        )
+
+    def process_file(self, file_path: str) -> bool:
+        """Process a CSV/Excel file chunk by chunk"""
+        try:
+            with self.metrics.capture_queries():
+                self.job.status = 'processing'
+                self.job.started_at = datetime.now()
+                self.job.save()
+                
+                if self.should_shard(file_path):
+                    processed = self.process_sharded(file_path)
+                else:
+                    with self.metrics.stage('read'):
+                        self.job.total_records = self.count_rows(file_path)
+                    self.job.save()
+                    
+                    progress = {'processed': 0}
+                    def on_chunk(rows):
+                        progress['processed'] += rows
+                        self.update_progress(progress['processed'], max(self.job.total_records, progress['processed']))
+                    
+                    # +2 for header and 0-indexing
+                    processed = self.process_chunks(self.read_chunks(file_path), 2, on_chunk)
+                
+                # Excel files are only counted once they have been read
+                self.job.total_records = processed
+                self.update_progress(processed, processed)
+                
+                with self.metrics.stage('write'):
+                    self.refresh_rollups()
+                
+                with self.metrics.stage('audit'):
+                    self.log_import()
+            
+            self.finalize_job()
+            return True
+            
+        except Exception as e:
+            logger.error(f"{self.label} failed: {str(e)}")
+            self.job.status = 'failed'
+            self.job.error_details = [{'row': 0, 'field': 'file', 'error': str(e)}]
+            self.job.metrics = self.metrics.as_dict()
+            self.job.save()
+            return False
+
+    def process_sharded(self, file_path: str) -> int:
+        """Split the file on row boundaries and process the shards in parallel"""
+        workers = settings.BULK_UPLOAD_SHARD_WORKERS
+        with self.metrics.stage('read'):
+            plan = plan_shards(file_path, workers, self.SEED_COLUMNS)
+        self.job.total_records = plan.total_rows
+        self.job.save()
+        
+        with self.metrics.stage('resolve'):
+            seed = self.build_seed(plan.seed_values)
+        
+        # Workers open their own connections; don't hand ours to child processes
+        connections.close_all()
+        
+        context = multiprocessing.get_context(settings.BULK_UPLOAD_SHARD_START_METHOD)
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(plan.shards)),
+            mp_context=context,
+            initializer=init_worker,
+            initargs=(worker_settings(),),
+        ) as executor:
+            futures = [
+                executor.submit(run_shard, type(self), self.job.pk, file_path, shard, plan.header, seed)
+                for shard in plan.shards
+            ]
+            for future in futures:
+                result = future.result()
+                self.success_count += result['success_count']
+                self.errors.extend(result['errors'])
+                self.metrics.merge(result['metrics'])
+        
+        self.errors.sort(key=lambda error: error['row'])
+        return plan.total_rows
+
+    def process_shard(self, file_path: str, start: int, end: int, first_row_number: int, header: list):
+        """Process one byte range of a CSV file inside a shard worker"""
+        total = self.job.total_records
+        
+        def on_chunk(rows):
+            BulkUploadJob.objects.filter(pk=self.job.pk).update(
+                processed_records=F('processed_records') + rows,
+                progress_percentage=ExpressionWrapper(
+                    Least((F('processed_records') + rows) * 100.0 / max(total, 1), 100),
+                    output_field=models.DecimalField(max_digits=5, decimal_places=2)
+                ),
+            )
+        
+        with self.metrics.capture_queries():
+            with io.BufferedReader(ByteRangeFile(file_path, start, end)) as shard_file:
+                chunks = iter(pd.read_csv(shard_file, header=None, names=header, chunksize=self.chunk_size))
+                self.process_chunks(chunks, first_row_number, on_chunk)
+
+    def refresh_rollups(self):
+        """Rebuild the analytics rollups and cache versions of the companies the job touched"""
+        pass
+
+    def log_import(self):
+        """Record a single audit entry summarising the import"""
+        AuditLog.objects.create(
+            action='BULK_IMPORT',
+            table_name=self.job.operation_type,
+            record_id=str(self.job.id),
+            description=f"{self.label} of '{self.job.file_name}': {self.success_count} rows imported, {len(self.errors)} failed",
+            user=self.job.created_by,
+            metadata={
+                'company_id': self.job.company_id,
+                'job_id': str(self.job.id),
+                'success_records': self.success_count,
+                'error_records': len(self.errors),
+            }
+        )
+
     def finalize_job(self):
         """Finalize the job with results"""
         self.job.success_records = self.success_count
         self.job.error_records = len(self.errors)
         self.job.error_details = self.errors
         self.job.completed_at = datetime.now()
+        self.job.metrics = self.metrics.as_dict()
         
         if self.errors and self.success_count > 0:
             self.job.status = 'partial'
@@ -55,50 +294,102 @@ class EmployeeBulkProcessor(BulkUploadProcessor):
     REQUIRED_FIELDS = ['name', 'role', 'department', 'start_date']
     OPTIONAL_FIELDS = ['employee_id', 'email', 'phone', 'employment_type', 'salary', 'duties']
 
-    def process_file(self, file_path: str) -> bool:
-        """Process employee CSV/Excel file"""
+    SEED_COLUMNS = [('company_name', 'department')]
 
-        if self.job.created_by.profile.role.name == 'talent_verify_admin':
-            self.REQUIRED_FIELDS.append('company_name')
+    def __init__(self, job: BulkUploadJob):
+        super().__init__(job)
+        self.is_admin_upload = job.created_by.profile.role.name == 'talent_verify_admin'
+        self.required_fields = list(self.REQUIRED_FIELDS)
+        if self.is_admin_upload:
+            self.required_fields.append('company_name')
+        
+        # Lookups shared by every row: lowercased name -> Company, (company id, lowercased name) -> Department
+        self.companies = {}
+        self.departments = {}
+        self.created_departments = []
+
+    def refresh_rollups(self):
+        company_ids = set(Employee.objects.filter(bulk_job=self.job).values_list('company_id', flat=True).distinct())
+        company_ids.update(
+            EmployeePosition.objects.filter(bulk_job=self.job).values_list('employee__company_id', flat=True).distinct()
+        )
+        if company_ids:
+            rebuild_rollups(company_ids)
+            bump_company_versions(company_ids)
+
+    def build_seed(self, seed_values: dict) -> dict:
+        """Resolve every company and the departments named with it in the file once"""
+        pairs = seed_values.get(('company_name', 'department'), set())
+        companies = {}
+        if self.is_admin_upload:
+            for company_name in {company_name for company_name, _ in pairs if company_name}:
+                company = Company.objects.filter(name__iexact=company_name).first()
+                if company:
+                    companies[company_name.lower()] = company.id
+        profile_company_id = self.job.created_by.profile.company_id
+        
+        departments = {}
+        for company_name, department_name in pairs:
+            company_id = companies.get(company_name.lower()) if self.is_admin_upload else profile_company_id
+            key = (company_id, department_name.lower())
+            # Only pairs that appear on a row; rows naming an unknown company fail on their own
+            if company_id is None or not department_name or key in departments:
+                continue
+            department, created = Department.objects.get_or_create(
+                company_id=company_id,
+                name__iexact=department_name,
+                defaults={'name': department_name, 'bulk_job': self.job}
+            )
+            departments[key] = (department.id, department.name)
+        
+        return {'companies': companies, 'departments': departments}
+
+    def load_seed(self, seed: dict):
+        company_ids = seed.get('companies', {})
+        companies = Company.objects.in_bulk(set(company_ids.values()))
+        for key, company_id in company_ids.items():
+            self.companies[key] = companies[company_id]
+        for (company_id, key), (department_id, name) in seed.get('departments', {}).items():
+            self.departments[(company_id, key)] = Department(id=department_id, company_id=company_id, name=name)
+
+    def resolve_company(self, data):
+        if not self.is_admin_upload:
+            return self.job.created_by.profile.company
+        
+        company_name = str(data['company_name']).strip()
+        company = self.companies.get(company_name.lower())
+        if company is None:
+            try:
+                company = Company.objects.get(name__iexact=company_name)
+            except Company.DoesNotExist:
+                raise ValueError(f"Company '{company_name}' not found")
+            self.companies[company_name.lower()] = company
+        return company
+
+    def resolve_department(self, company, department_name):
+        key = (company.id, department_name.lower())
+        department = self.departments.get(key)
+        if department is None:
+            department, created = Department.objects.get_or_create(
+                company=company,
+                name__iexact=department_name,
+                defaults={'name': department_name, 'bulk_job': self.job}
+            )
+            self.departments[key] = department
+            if created:
+                self.created_departments.append(key)
+        return department
+
+    def process_row(self, row_number: int, row_data: pd.Series):
         try:
-            self.job.status = 'processing'
-            self.job.started_at = datetime.now()
-            self.job.save()
-            
-            # Read file based on extension
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            elif file_path.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(file_path)
-            else:
-                raise ValueError("Unsupported file format")
-            
-            self.job.total_records = len(df)
-            self.job.save()
-            
-            # Process each row
-            for index, row in df.iterrows():
-                try:
-                    self.process_employee_row(index + 2, row)  # +2 for header and 0-indexing
-                    self.success_count += 1
-                except Exception as e:
-                    self.add_error(index + 2, 'general', str(e))
-                
-                # Update progress every 10 records
-                if (index + 1) % 10 == 0:
-                    self.update_progress(index + 1, len(df))
-            
-            # Final progress update
-            self.update_progress(len(df), len(df))
-            self.finalize_job()
-            return True
-            
-        except Exception as e:
-            logger.error(f"Bulk upload failed: {str(e)}")
-            self.job.status = 'failed'
-            self.job.error_details = [{'row': 0, 'field': 'file', 'error': str(e)}]
-            self.job.save()
-            return False
+            self.process_employee_row(row_number, row_data)
+        except Exception:
+            # Departments created inside a rolled back row no longer exist
+            for key in self.created_departments:
+                self.departments.pop(key, None)
+            raise
+        finally:
+            self.created_departments = []
         
     @transaction.atomic
     def process_employee_row(self, row_number: int, row_data: pd.Series):
@@ -106,29 +397,15 @@ class EmployeeBulkProcessor(BulkUploadProcessor):
         data = row_data.to_dict()
         
         # Validate required fields
-        for field in self.REQUIRED_FIELDS:
-            if field not in data or pd.isna(data[field]) or str(data[field]).strip() == '':
-                raise ValueError(f"Missing required field: {field}")
+        with self.metrics.stage('validate'):
+            for field in self.required_fields:
+                if field not in data or pd.isna(data[field]) or str(data[field]).strip() == '':
+                    raise ValueError(f"Missing required field: {field}")
+            start_date = self.parse_date(data['start_date'])
         
-        # Get or create company
-        if self.job.created_by.profile.role.name == 'talent_verify_admin':
-            company_name = str(data['company_name']).strip()
-            try:
-                company = Company.objects.get(name__iexact=company_name)
-            except Company.DoesNotExist:
-                raise ValueError(f"Company '{company_name}' not found")
-        else:
-            company = self.job.created_by.profile.company
-        
-        # print(company)
-
-        # Get or create department
-        department_name = str(data['department']).strip()
-        department, created = Department.objects.get_or_create(
-            company=company,
-            name__iexact=department_name,
-            defaults={'name': department_name}
-        )
+        with self.metrics.stage('resolve'):
+            company = self.resolve_company(data)
+            department = self.resolve_department(company, str(data['department']).strip())
         
         # Check if employee already exists
         employee_name = str(data['name']).strip()
@@ -141,16 +418,21 @@ class EmployeeBulkProcessor(BulkUploadProcessor):
         employee_data = {
             'company': company,
             'is_active': True,
+            'bulk_job': self.job,
         }
         
-        employee = Employee.objects.create(**employee_data)
+        with self.metrics.stage('write'):
+            employee = Employee.objects.create(**employee_data)
         
         # Set encrypted fields
-        employee.name = employee_name
-        employee.employee_id = employee_id
-        employee.email = str(data.get('email', '')).strip()
-        employee.phone = str(data.get('phone', '')).strip()
-        employee.save()
+        with self.metrics.stage('encrypt'):
+            employee.name = employee_name
+            employee.employee_id = employee_id
+            employee.email = str(data.get('email', '')).strip()
+            employee.phone = str(data.get('phone', '')).strip()
+        
+        with self.metrics.stage('write'):
+            employee.save()
         
         # Create position
         position_data = {
@@ -158,10 +440,11 @@ class EmployeeBulkProcessor(BulkUploadProcessor):
             'department': department,
             'role': str(data['role']).strip(),
             'duties': str(data.get('duties', '')).strip(),
-            'start_date': self.parse_date(data['start_date']),
+            'start_date': start_date,
             'employment_type': str(data.get('employment_type', 'full_time')).strip(),
             'is_current': True,
             'created_by': self.job.created_by,
+            'bulk_job': self.job,
         }
         
         # Add salary if provided
@@ -171,7 +454,8 @@ class EmployeeBulkProcessor(BulkUploadProcessor):
             except (ValueError, TypeError):
                 pass  # Skip invalid salary values
         
-        EmployeePosition.objects.create(**position_data)
+        with self.metrics.stage('write'):
+            EmployeePosition.objects.create(**position_data)
 
     def parse_date(self, date_value):
         """Parse date from various formats"""
@@ -201,45 +485,10 @@ class CompanyBulkProcessor(BulkUploadProcessor):
     REQUIRED_FIELDS = ['name', 'registration_number', 'registration_date', 'contact_person', 'email', 'address']
     OPTIONAL_FIELDS = ['phone', 'employee_count', 'departments']
 
-    def process_file(self, file_path: str) -> bool:
-        """Process company CSV/Excel file"""
-        try:
-            self.job.status = 'processing'
-            self.job.started_at = datetime.now()
-            self.job.save()
-            
-            # Read file
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            elif file_path.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(file_path)
-            else:
-                raise ValueError("Unsupported file format")
-            
-            self.job.total_records = len(df)
-            self.job.save()
-            
-            # Process each row
-            for index, row in df.iterrows():
-                try:
-                    self.process_company_row(index + 2, row)
-                    self.success_count += 1
-                except Exception as e:
-                    self.add_error(index + 2, 'general', str(e))
-                
-                if (index + 1) % 10 == 0:
-                    self.update_progress(index + 1, len(df))
-            
-            self.update_progress(len(df), len(df))
-            self.finalize_job()
-            return True
-            
-        except Exception as e:
-            logger.error(f"Company bulk upload failed: {str(e)}")
-            self.job.status = 'failed'
-            self.job.error_details = [{'row': 0, 'field': 'file', 'error': str(e)}]
-            self.job.save()
-            return False
+    label = 'Company bulk upload'
+
+    def process_row(self, row_number: int, row_data: pd.Series):
+        self.process_company_row(row_number, row_data)
         
     @transaction.atomic
     def process_company_row(self, row_number: int, row_data: pd.Series):
@@ -247,40 +496,46 @@ class CompanyBulkProcessor(BulkUploadProcessor):
         data = row_data.to_dict()
         
         # Validate required fields
-        for field in self.REQUIRED_FIELDS:
-            if field not in data or pd.isna(data[field]) or str(data[field]).strip() == '':
-                raise ValueError(f"Missing required field: {field}")
+        with self.metrics.stage('validate'):
+            for field in self.REQUIRED_FIELDS:
+                if field not in data or pd.isna(data[field]) or str(data[field]).strip() == '':
+                    raise ValueError(f"Missing required field: {field}")
+            registration_date = self.parse_date(data['registration_date'])
         
         # Check for duplicate registration number
         reg_number = str(data['registration_number']).strip()
-        if Company.objects.filter(registration_number=reg_number).exists():
-            raise ValueError(f"Company with registration number '{reg_number}' already exists")
+        with self.metrics.stage('resolve'):
+            if Company.objects.filter(registration_number=reg_number).exists():
+                raise ValueError(f"Company with registration number '{reg_number}' already exists")
         
         # Create company
         company_data = {
             'name': str(data['name']).strip(),
             'registration_number': reg_number,
-            'registration_date': self.parse_date(data['registration_date']),
+            'registration_date': registration_date,
             'contact_person': str(data['contact_person']).strip(),
             'email': str(data['email']).strip(),
             'address': str(data['address']).strip(),
             'phone': str(data.get('phone', '')).strip(),
             'employee_count': int(data.get('employee_count', 0)) if not pd.isna(data.get('employee_count')) else 0,
             'created_by': self.job.created_by,
+            'bulk_job': self.job,
         }
         
-        company = Company.objects.create(**company_data)
-        
-        # Create departments if provided
-        if 'departments' in data and not pd.isna(data['departments']):
-            dept_names = str(data['departments']).split(',')
-            for dept_name in dept_names:
-                dept_name = dept_name.strip()
-                if dept_name:
-                    Department.objects.create(
-                        company=company,
-                        name=dept_name
-                    )
+        with self.metrics.stage('write'):
+            company = Company.objects.create(**company_data)
+            
+            # Create departments if provided
+            if 'departments' in data and not pd.isna(data['departments']):
+                dept_names = str(data['departments']).split(',')
+                for dept_name in dept_names:
+                    dept_name = dept_name.strip()
+                    if dept_name:
+                        Department.objects.create(
+                            company=company,
+                            name=dept_name,
+                            bulk_job=self.job
+                        )
     def parse_date(self, date_value):
         """Parse date from various formats"""
         if pd.isna(date_value):
@@ -295,4 +550,88 @@ class CompanyBulkProcessor(BulkUploadProcessor):
             except ValueError:
                 continue
         
-        raise ValueError(f"Unable to parse date: {date_str}")
\ No newline at end of file
+        raise ValueError(f"Unable to parse date: {date_str}")
+
+class ArchiveProcessor:
+    """Process every CSV/Excel file in a zip upload as a sub-job of the upload's job"""
+    
+    def __init__(self, job: BulkUploadJob, processor_class):
+        self.job = job
+        self.processor_class = processor_class
+
+    def list_members(self, file_path: str) -> List[str]:
+        with zipfile.ZipFile(file_path) as archive:
+            members = []
+            for info in archive.infolist():
+                if info.is_dir() or info.filename.startswith('__MACOSX/'):
+                    continue
+                try:
+                    if file_format(info.filename) in ('csv', 'excel'):
+                        members.append(info.filename)
+                except ValueError:
+                    continue
+            return members
+
+    def process_file(self, file_path: str) -> bool:
+        # Started here so total_seconds covers extracting and processing every member
+        self.metrics = JobMetrics()
+        try:
+            self.job.status = 'processing'
+            self.job.started_at = datetime.now()
+            self.job.save()
+            
+            members = self.list_members(file_path)
+            if not members:
+                raise ValueError("Archive does not contain any CSV or Excel files")
+            
+            sub_jobs = [
+                BulkUploadJob.objects.create(
+                    parent=self.job,
+                    operation_type=self.job.operation_type,
+                    file_name=member,
+                    file_path=file_path,
+                    archive_member=member,
+                    created_by=self.job.created_by,
+                    company=self.job.company,
+                )
+                for member in members
+            ]
+            
+            # Members are decompressed one at a time straight into the chunked reader
+            for sub_job in sub_jobs:
+                self.processor_class(sub_job).process_file(file_path)
+            
+            self.finalize_job(sub_jobs)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Archive bulk upload failed: {str(e)}")
+            self.job.status = 'failed'
+            self.job.error_details = [{'row': 0, 'field': 'file', 'error': str(e)}]
+            self.job.save()
+            return False
+
+    def finalize_job(self, sub_jobs: List[BulkUploadJob]):
+        """Combine the sub-job results into the archive job"""
+        self.job.refresh_from_sub_jobs()
+        self.job.refresh_from_db()
+        
+        errors = []
+        for sub_job in sub_jobs:
+            sub_job.refresh_from_db()
+            self.metrics.merge(sub_job.metrics)
+            for error in sub_job.error_details:
+                errors.append({'file': sub_job.file_name, **error})
+        
+        self.job.error_details = errors
+        self.job.metrics = self.metrics.as_dict()
+        self.job.completed_at = datetime.now()
+        
+        if errors and self.job.success_records > 0:
+            self.job.status = 'partial'
+        elif errors:
+            self.job.status = 'failed'
+        else:
+            self.job.status = 'completed'
+        
+        self.job.save()
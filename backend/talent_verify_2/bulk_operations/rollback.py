@@ -0,0 +1,133 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from authentication.models import UserInvitation, UserProfile
+from companies.models import Company, Department
+from companies.versions import bump_company_versions
+from employees.models import Employee, EmployeePosition, EmployeeDocument, EmployeeSearchToken, EmployeeAnalyticsRollup
+from employees.rollups import rebuild_rollups
+from audit.models import AuditLog
+from .models import BulkUploadJob
+
+def raw_delete(queryset):
+    """
+    Delete rows with a single DELETE statement.
+
+    QuerySet.delete() loads every instance to run signals and cascades, which
+    is what makes rolling back a large import slow. Callers remove or null the
+    rows that reference these ones first.
+    """
+    return queryset._raw_delete(queryset.db)
+
+def batched_ids(queryset, batch_size):
+    """Yield lists of primary keys, re-querying so deleted rows drop out"""
+    while True:
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return
+        yield ids
+
+def delete_positions(position_ids):
+    employee_ids = set(EmployeePosition.objects.filter(pk__in=position_ids).values_list('employee_id', flat=True))
+    EmployeePosition.objects.filter(manager_id__in=position_ids).update(manager=None)
+    Employee.objects.filter(current_position_id__in=position_ids).update(current_position=None)
+    deleted = raw_delete(EmployeePosition.objects.filter(pk__in=position_ids))
+    Employee.objects.filter(pk__in=employee_ids).refresh_experience()
+    return deleted
+
+def rollback_job(job: BulkUploadJob, user=None) -> dict:
+    """
+    Delete everything a bulk import created, in set-based batches.
+
+    Rows are found through their bulk_job tag (including the sub-jobs of zip
+    uploads). Each batch runs in its own transaction so a large rollback never
+    holds locks for long and can simply be re-run if it is interrupted.
+    Departments and companies that other data has started using since the
+    import are kept and reported.
+    """
+    batch_size = settings.BULK_ROLLBACK_BATCH_SIZE
+    job_ids = [job.pk, *job.sub_jobs.values_list('pk', flat=True)]
+    counts = {
+        'employees': 0,
+        'positions': 0,
+        'documents': 0,
+        'departments': 0,
+        'companies': 0,
+        'kept_departments': 0,
+        'kept_companies': 0,
+    }
+
+    # Companies whose analytics rollups and cached answers change
+    rollup_company_ids = set(Employee.objects.filter(bulk_job__in=job_ids).values_list('company_id', flat=True).distinct())
+    rollup_company_ids.update(
+        EmployeePosition.objects.filter(bulk_job__in=job_ids).values_list('employee__company_id', flat=True).distinct()
+    )
+
+    # Employees together with their positions and documents
+    for employee_ids in batched_ids(Employee.objects.filter(bulk_job__in=job_ids), batch_size):
+        with transaction.atomic():
+            position_ids = list(EmployeePosition.objects.filter(employee_id__in=employee_ids).values_list('pk', flat=True))
+            counts['positions'] += delete_positions(position_ids)
+            counts['documents'] += raw_delete(EmployeeDocument.objects.filter(employee_id__in=employee_ids))
+            raw_delete(EmployeeSearchToken.objects.filter(employee_id__in=employee_ids))
+            counts['employees'] += raw_delete(Employee.objects.filter(pk__in=employee_ids))
+
+    # Positions the job added to employees that existed before it
+    for position_ids in batched_ids(EmployeePosition.objects.filter(bulk_job__in=job_ids), batch_size):
+        with transaction.atomic():
+            counts['positions'] += delete_positions(position_ids)
+
+    # Before departments go, so no rollup row points at them
+    rebuild_rollups(rollup_company_ids)
+    bump_company_versions(rollup_company_ids)
+
+    # Departments nothing points at any more
+    departments = Department.objects.filter(bulk_job__in=job_ids)
+    unused_departments = departments.exclude(
+        Exists(EmployeePosition.objects.filter(department=OuterRef('pk')))
+    )
+    for department_ids in batched_ids(unused_departments, batch_size):
+        with transaction.atomic():
+            counts['departments'] += raw_delete(Department.objects.filter(pk__in=department_ids))
+    counts['kept_departments'] = departments.count()
+
+    # Companies without employees, departments, jobs or invitations of their own
+    companies = Company.objects.filter(bulk_job__in=job_ids)
+    unused_companies = companies.exclude(
+        Q(Exists(Employee.objects.filter(company=OuterRef('pk'))))
+        | Q(Exists(EmployeePosition.objects.filter(department__company=OuterRef('pk'))))
+        | Q(Exists(Department.objects.filter(company=OuterRef('pk')).exclude(bulk_job__in=job_ids)))
+        | Q(Exists(BulkUploadJob.objects.filter(company=OuterRef('pk'))))
+        | Q(Exists(UserInvitation.objects.filter(company=OuterRef('pk'))))
+    )
+    for company_ids in batched_ids(unused_companies, batch_size):
+        with transaction.atomic():
+            UserProfile.objects.filter(company_id__in=company_ids).update(company=None)
+            raw_delete(EmployeeAnalyticsRollup.objects.filter(company_id__in=company_ids))
+            counts['departments'] += raw_delete(Department.objects.filter(company_id__in=company_ids))
+            counts['companies'] += raw_delete(Company.objects.filter(pk__in=company_ids))
+    counts['kept_companies'] = companies.count()
+
+    BulkUploadJob.objects.filter(pk__in=job_ids).update(status='rolled_back')
+    job.refresh_from_db()
+
+    AuditLog.objects.create(
+        action='BULK_ROLLBACK',
+        table_name=job.operation_type,
+        record_id=str(job.pk),
+        description=(
+            f"Rolled back bulk upload '{job.file_name}': {counts['employees']} employees, "
+            f"{counts['positions']} positions, {counts['departments']} departments and "
+            f"{counts['companies']} companies deleted"
+        ),
+        user=user,
+        metadata={
+            'company_id': job.company_id,
+            'job_id': str(job.pk),
+            'rolled_back_at': timezone.now().isoformat(),
+            **counts,
+        }
+    )
+
+    return counts
@@ -4,6 +4,7 @@ from .models import BulkUploadJob
 class BulkUploadJobSerializer(serializers.ModelSerializer):
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
     company_name = serializers.CharField(source='company.name', read_only=True)
+    sub_jobs = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
     
     class Meta:
         model = BulkUploadJob
@@ -11,12 +12,13 @@ class BulkUploadJobSerializer(serializers.ModelSerializer):
             'id', 'operation_type', 'status', 'file_name',
             'total_records', 'processed_records', 'success_records', 'error_records',
             'progress_percentage', 'error_details', 'created_by_name', 'company_name',
+            'file_hash', 'parent', 'archive_member', 'sub_jobs',
             'created_at', 'started_at', 'completed_at'
         ]
         read_only_fields = [
             'id', 'status', 'total_records', 'processed_records', 'success_records',
-            'error_records', 'progress_percentage', 'error_details', 'created_at',
-            'started_at', 'completed_at'
+            'error_records', 'progress_percentage', 'error_details', 'file_hash',
+            'parent', 'archive_member', 'created_at', 'started_at', 'completed_at'
         ]
 
 from companies.models import Company
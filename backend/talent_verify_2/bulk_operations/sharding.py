@@ -0,0 +1,162 @@
+import csv
+import io
+import logging
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+class ShardPlan:
+    """Byte ranges of a CSV file split on row boundaries"""
+
+    def __init__(self, header, shards, total_rows, seed_values):
+        self.header = header
+        self.shards = shards  # [(start_offset, end_offset, first_row_number, row_count)]
+        self.total_rows = total_rows
+        self.seed_values = seed_values  # {column or tuple of columns: set of distinct values}
+
+def plan_shards(file_path: str, shard_count: int, seed_columns=()) -> ShardPlan:
+    """
+    Split a CSV file into roughly equal byte ranges in a single streaming pass.
+
+    Boundaries are only placed between complete records, so quoted fields
+    spanning several lines stay in one shard. Row numbers follow the same
+    convention as the single process reader: blank lines are skipped and the
+    first data row is row 2. Distinct values of seed_columns are collected on
+    the way so that lookups can be resolved once before the shards start. A
+    tuple of columns collects the distinct combinations found on the same row,
+    with '' for columns missing from the file.
+    """
+    with open(file_path, 'rb') as f:
+        header_line = f.readline()
+        header = next(csv.reader([header_line.decode('utf-8-sig')]))
+        seed_indexes = {}
+        for column in seed_columns:
+            if isinstance(column, tuple):
+                if any(name in header for name in column):
+                    seed_indexes[column] = tuple(header.index(name) if name in header else None for name in column)
+            elif column in header:
+                seed_indexes[column] = header.index(column)
+        seed_values = {column: set() for column in seed_indexes}
+
+        f.seek(0, io.SEEK_END)
+        data_size = f.tell() - len(header_line)
+        f.seek(len(header_line))
+        target_size = max(data_size // max(shard_count, 1), 1)
+
+        shards = []
+        offset = shard_start = len(header_line)
+        shard_first_row = 2
+        shard_rows = 0
+        total_rows = 0
+        record = []
+        in_quotes = False
+
+        for line in f:
+            offset += len(line)
+            record.append(line)
+            # An odd number of quotes toggles whether the record continues
+            if line.count(b'"') % 2:
+                in_quotes = not in_quotes
+            if in_quotes:
+                continue
+
+            raw_record = b''.join(record)
+            record = []
+            if not raw_record.strip():
+                continue
+
+            total_rows += 1
+            shard_rows += 1
+            if seed_indexes:
+                values = next(csv.reader(io.StringIO(raw_record.decode('utf-8'))), [])
+                for column, index in seed_indexes.items():
+                    if isinstance(index, tuple):
+                        combination = tuple(
+                            values[i].strip() if i is not None and i < len(values) else '' for i in index
+                        )
+                        if any(combination):
+                            seed_values[column].add(combination)
+                    elif index < len(values) and values[index].strip():
+                        seed_values[column].add(values[index].strip())
+
+            if offset - shard_start >= target_size and len(shards) < shard_count - 1:
+                shards.append((shard_start, offset, shard_first_row, shard_rows))
+                shard_start = offset
+                shard_first_row += shard_rows
+                shard_rows = 0
+
+        if shard_rows or not shards:
+            shards.append((shard_start, offset, shard_first_row, shard_rows))
+
+    return ShardPlan(header, shards, total_rows, seed_values)
+
+class ByteRangeFile(io.RawIOBase):
+    """Read-only file object limited to a byte range of a file on disk"""
+
+    def __init__(self, file_path: str, start: int, end: int):
+        self._file = open(file_path, 'rb')
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._remaining <= 0:
+            return 0
+        view = memoryview(buffer)[:min(len(buffer), self._remaining)]
+        read = self._file.readinto(view)
+        self._remaining -= read
+        return read
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+def run_shard(processor_class, job_id, file_path, shard, header, seed):
+    """
+    Process one shard in a worker process.
+
+    Each worker opens its own database connection, reuses the lookups resolved
+    by the parent and adds its progress to the parent job as it goes. Returns
+    the success count, errors and metrics for the parent to merge. Rows are
+    committed one by one, so a shard that fails part way still reports the
+    rows it processed, plus an error at the row where it stopped.
+    """
+    from .models import BulkUploadJob
+
+    start, end, first_row_number, row_count = shard
+    processor = None
+    try:
+        job = BulkUploadJob.objects.select_related('created_by__profile__role', 'company').get(pk=job_id)
+        processor = processor_class(job)
+        processor.load_seed(seed)
+        processor.process_shard(file_path, start, end, first_row_number, header)
+        return {
+            'success_count': processor.success_count,
+            'errors': processor.errors,
+            'metrics': processor.metrics.as_dict(),
+        }
+    except Exception as e:
+        logger.error(f"Shard {start}-{end} of job {job_id} failed: {str(e)}")
+        if processor is None:
+            return {
+                'success_count': 0,
+                'errors': [{'row': first_row_number, 'field': 'shard', 'error': str(e)}],
+                'metrics': {},
+            }
+        failed_row = first_row_number if processor.last_row_number is None else processor.last_row_number + 1
+        return {
+            'success_count': processor.success_count,
+            'errors': [
+                *processor.errors,
+                {
+                    'row': failed_row,
+                    'field': 'shard',
+                    'error': f"{str(e)} (rows {failed_row}-{first_row_number + row_count - 1} were not processed)",
+                },
+            ],
+            'metrics': processor.metrics.as_dict(),
+        }
+    finally:
+        connections.close_all()
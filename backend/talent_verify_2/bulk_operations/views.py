@@ -3,12 +3,18 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.utils import timezone
+from django.db import transaction
+from datetime import timedelta
+import hashlib
 import os
 import uuid
 from .models import BulkUploadJob
 from .serializers import BulkUploadJobSerializer, BulkUploadCreateSerializer
-from .processors import EmployeeBulkProcessor, CompanyBulkProcessor
+from .processors import EmployeeBulkProcessor, CompanyBulkProcessor, ArchiveProcessor, file_format
+from .metrics import summarize_metrics
+from .rollback import rollback_job
 # from .tasks import process_bulk_upload  # We'll create this for async processing
 from authentication.permissions import RoleBasedPermission, CompanyDataPermission
 from django.http import HttpResponse
@@ -29,6 +35,10 @@ class BulkUploadViewSet(viewsets.ModelViewSet):
             else:
                 queryset = queryset.filter(created_by=user)
         
+        # Sub-jobs of zip uploads are reached through their parent job
+        if self.action == 'list':
+            queryset = queryset.filter(parent__isnull=True)
+        
         return queryset
     
     def create(self, request, *args, **kwargs):
@@ -39,20 +49,44 @@ class BulkUploadViewSet(viewsets.ModelViewSet):
         )
         
         if serializer.is_valid():
-            # Save uploaded file
             uploaded_file = serializer.validated_data['file']
-            file_extension = os.path.splitext(uploaded_file.name)[1]
+            operation_type = serializer.validated_data['operation_type']
+            company = serializer.validated_data.get('company') or request.user.profile.company
+            idempotency_key = request.headers.get('Idempotency-Key', '').strip()
+            
+            # Hash the upload while streaming it, before anything touches storage
+            file_hash = self.hash_uploaded_file(uploaded_file)
+            
+            # Return the original job for double submits and re-sent files
+            existing_job = self.find_existing_job(
+                request.user, file_hash, operation_type, company, idempotency_key
+            )
+            if existing_job:
+                if idempotency_key and existing_job.file_hash != file_hash:
+                    return Response(
+                        {'error': 'Idempotency-Key was already used for a different file'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                return Response(BulkUploadJobSerializer(existing_job).data, status=status.HTTP_200_OK)
+            
+            # Save uploaded file
+            if uploaded_file.name.lower().endswith('.csv.gz'):
+                file_extension = '.csv.gz'
+            else:
+                file_extension = os.path.splitext(uploaded_file.name)[1]
             file_name = f"bulk_upload_{uuid.uuid4()}{file_extension}"
-            file_path = default_storage.save(f"bulk_uploads/{file_name}", ContentFile(uploaded_file.read()))
+            file_path = default_storage.save(f"bulk_uploads/{file_name}", uploaded_file)
             full_file_path = default_storage.path(file_path)
             
             # Create job
             job = BulkUploadJob.objects.create(
-                operation_type=serializer.validated_data['operation_type'],
+                operation_type=operation_type,
                 file_name=uploaded_file.name,
                 file_path=full_file_path,
+                file_hash=file_hash,
+                idempotency_key=idempotency_key,
                 created_by=request.user,
-                company=serializer.validated_data.get('company') or request.user.profile.company
+                company=company
             )
             
             # Process file asynchronously (for now, we'll process synchronously)
@@ -66,19 +100,50 @@ class BulkUploadViewSet(viewsets.ModelViewSet):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    def hash_uploaded_file(self, uploaded_file):
+        """Compute the SHA-256 of an uploaded file chunk by chunk"""
+        digest = hashlib.sha256()
+        for chunk in uploaded_file.chunks():
+            digest.update(chunk)
+        uploaded_file.seek(0)
+        return digest.hexdigest()
+    
+    def find_existing_job(self, user, file_hash, operation_type, company, idempotency_key=''):
+        """Find a recent job that this upload duplicates, if any"""
+        window_start = timezone.now() - settings.BULK_UPLOAD_IDEMPOTENCY_WINDOW
+        recent_jobs = BulkUploadJob.objects.filter(created_at__gte=window_start)
+        
+        if idempotency_key:
+            job = recent_jobs.filter(created_by=user, idempotency_key=idempotency_key).first()
+            if job:
+                return job
+        
+        # Failed and rolled back jobs are not reused so that a re-upload is processed
+        return recent_jobs.filter(
+            file_hash=file_hash,
+            company=company,
+            operation_type=operation_type,
+        ).exclude(status__in=['failed', 'rolled_back']).first()
+    
     def process_upload_sync(self, job):
         """Process upload synchronously (for MVP)"""
         try:
             if job.operation_type == 'employee_import':
-                processor = EmployeeBulkProcessor(job)
+                processor_class = EmployeeBulkProcessor
             elif job.operation_type == 'company_import':
-                processor = CompanyBulkProcessor(job)
+                processor_class = CompanyBulkProcessor
             else:
                 job.status = 'failed'
                 job.error_details = [{'error': 'Unsupported operation type'}]
                 job.save()
                 return
             
+            # Each file in a zip archive becomes a sub-job with its own processor
+            if file_format(job.file_path) == 'zip':
+                processor = ArchiveProcessor(job, processor_class)
+            else:
+                processor = processor_class(job)
+            
             processor.process_file(job.file_path)
             
         except Exception as e:
@@ -161,21 +226,79 @@ class BulkUploadViewSet(viewsets.ModelViewSet):
             )
         
         # Reset job status
-        job.status = 'pending'
-        job.processed_records = 0
-        job.success_records = 0
-        job.error_records = 0
-        job.error_details = []
-        job.progress_percentage = 0
-        job.started_at = None
-        job.completed_at = None
-        job.save()
+        with transaction.atomic():
+            job.clear_sub_jobs()
+            job.status = 'pending'
+            job.processed_records = 0
+            job.success_records = 0
+            job.error_records = 0
+            job.error_details = []
+            job.progress_percentage = 0
+            job.started_at = None
+            job.completed_at = None
+            job.save()
         
         # Process again
         self.process_upload_sync(job)
         
         return Response(BulkUploadJobSerializer(job).data)
     
+    @action(detail=True, methods=['post'])
+    def rollback(self, request, pk=None):
+        """Delete everything a bulk upload job created"""
+        job = self.get_object()
+        
+        if job.status in ['pending', 'processing']:
+            return Response(
+                {'error': 'Jobs that are still running cannot be rolled back'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if job.status == 'rolled_back':
+            return Response(
+                {'error': 'Job has already been rolled back'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        counts = rollback_job(job, user=request.user)
+        
+        return Response({
+            'job': BulkUploadJobSerializer(job).data,
+            'deleted': counts,
+        })
+    
+    @action(detail=True, methods=['get'])
+    def metrics(self, request, pk=None):
+        """Get stage timings and resource usage for a job"""
+        job = self.get_object()
+        return Response({
+            'id': job.id,
+            'status': job.status,
+            'total_records': job.total_records,
+            'metrics': job.metrics,
+        })
+    
+    @action(detail=False, methods=['get'], url_path='metrics')
+    def metrics_summary(self, request):
+        """Get metric percentiles across recent jobs"""
+        queryset = self.get_queryset().exclude(metrics={})
+        
+        operation_type = request.query_params.get('operation_type')
+        if operation_type:
+            queryset = queryset.filter(operation_type=operation_type)
+        
+        days = request.query_params.get('days', '30')
+        limit = request.query_params.get('limit', '1000')
+        for name, value in (('days', days), ('limit', limit)):
+            if not value.isdigit() or int(value) < 1:
+                return Response({'error': f'{name} must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        days = min(int(days), 365)
+        queryset = queryset.filter(created_at__gte=timezone.now() - timedelta(days=days))
+        
+        limit = min(int(limit), 5000)
+        metrics_list = queryset.values_list('metrics', flat=True)[:limit]
+        return Response(summarize_metrics(metrics_list))
+    
     # @action(detail=False, methods=['post'])
     # def upload_companies(self, request):
     #     """Upload companies file"""
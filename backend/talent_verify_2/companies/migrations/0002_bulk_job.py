@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulk_operations', '0005_rolled_back_status'),
+        ('companies', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='bulk_job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_companies', to='bulk_operations.bulkuploadjob'),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='bulk_job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_departments', to='bulk_operations.bulkuploadjob'),
+        ),
+    ]
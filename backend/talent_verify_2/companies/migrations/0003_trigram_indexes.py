@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:30
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Expression indexes on UPPER(column) so the UPPER(...) LIKE UPPER(...) that
+# Django emits for icontains can use them
+TRIGRAM_INDEXES = [
+    ('companies_company_name_trgm', 'companies_company', 'name'),
+    ('companies_company_regno_trgm', 'companies_company', 'registration_number'),
+    ('companies_company_contact_trgm', 'companies_company', 'contact_person'),
+    ('companies_department_name_trgm', 'companies_department', 'name'),
+]
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'CREATE INDEX {name} ON {table} USING gin (UPPER({column}::text) gin_trgm_ops)')
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_bulk_job'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -13,6 +13,7 @@ class Company(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey('users.User', on_delete=models.SET_NULL, null=True, related_name='created_companies')
+    bulk_job = models.ForeignKey('bulk_operations.BulkUploadJob', on_delete=models.SET_NULL, null=True, blank=True, related_name='created_companies')
 
     class Meta:
         verbose_name_plural = "Companies"
@@ -25,6 +26,7 @@ class Department(models.Model):
     company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='departments')
     name = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
+    bulk_job = models.ForeignKey('bulk_operations.BulkUploadJob', on_delete=models.SET_NULL, null=True, blank=True, related_name='created_departments')
 
     class Meta:
         unique_together = ['company', 'name']
@@ -0,0 +1,34 @@
+import time
+from django.core.cache import cache
+from django.db import transaction
+
+# A per-company counter kept in the cache. Cached answers derived from a
+# company's employees and positions embed the version they were computed at,
+# so bumping it invalidates all of them at once. A version lost to eviction
+# restarts from the current time in ms, never from a value used before.
+
+def version_key(company_id):
+    return f'company-version:{company_id}'
+
+def company_version(company_id):
+    """The current data version of a company"""
+    key = version_key(company_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1_000_000, timeout=None)
+        version = cache.get(key)
+    return version
+
+def bump_company_versions(company_ids):
+    """Invalidate the cached answers of the given companies once the transaction commits"""
+    company_ids = {company_id for company_id in company_ids if company_id is not None}
+    if not company_ids:
+        return
+
+    def bump():
+        for company_id in company_ids:
+            try:
+                cache.incr(version_key(company_id))
+            except ValueError:
+                company_version(company_id)
+    transaction.on_commit(bump)
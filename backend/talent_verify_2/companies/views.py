@@ -2,7 +2,10 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
 from django.db.models import Q
+from django.db.models.functions import Greatest
 from .models import Company
 from .serializers import CompanySerializer
 
@@ -15,18 +18,25 @@ class CompanyViewSet(viewsets.ModelViewSet):
         search = self.request.query_params.get('search', None)
         
         if search:
+            # icontains is served by the UPPER() trigram indexes on PostgreSQL
             queryset = queryset.filter(
                 Q(name__icontains=search) |
                 Q(registration_number__icontains=search) |
                 Q(contact_person__icontains=search)
             )
+            if connections[queryset.db].vendor == 'postgresql':
+                queryset = queryset.annotate(similarity=Greatest(
+                    TrigramSimilarity('name', search),
+                    TrigramSimilarity('registration_number', search),
+                    TrigramSimilarity('contact_person', search),
+                )).order_by('-similarity', '-created_at')
         
         return queryset
 
     @action(detail=True, methods=['get'])
     def employees(self, request, pk=None):
         company = self.get_object()
-        employees = company.employees.all()
+        employees = company.employees.for_serializer()
         from employees.serializers import EmployeeSerializer
         serializer = EmployeeSerializer(employees, many=True)
         return Response(serializer.data)
\ No newline at end of file
@@ -0,0 +1,283 @@
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import django
+from collections import OrderedDict
+from time import monotonic
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+# Binary ciphertext layout: one version byte followed by the payload
+#   FORMAT_FERNET: raw (not base64) Fernet token
+#   FORMAT_AESGCM: 4 byte key id | 12 byte nonce | ciphertext and 16 byte tag
+FORMAT_FERNET = 1
+FORMAT_AESGCM = 2
+KEY_ID_SIZE = 4
+NONCE_SIZE = 12
+AESGCM_HEADER_SIZE = 1 + KEY_ID_SIZE
+BLIND_INDEX_LENGTH = 32
+
+CIPHERS = {'fernet': FORMAT_FERNET, 'aes-gcm': FORMAT_AESGCM}
+
+def derive_aead_key(key: bytes) -> bytes:
+    """Derive a 256 bit AES-GCM key from a Fernet key"""
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b'talent-verify pii aes-gcm',
+    ).derive(base64.urlsafe_b64decode(key))
+
+def normalize_for_index(value: str) -> str:
+    """Case and whitespace insensitive form of a value used for blind indexes"""
+    return ' '.join(value.split()).casefold()
+
+def edge_ngrams(value: str, min_length: int) -> dict:
+    """
+    Normalized words of a value and their prefixes of at least min_length
+    characters, mapped to whether the gram is a whole word.
+    """
+    grams = {}
+    for word in normalize_for_index(value).split():
+        grams[word] = True
+        for end in range(min_length, len(word)):
+            grams.setdefault(word[:end], False)
+    return grams
+
+class DecryptionCache:
+    """
+    Size-bounded LRU of decrypted values with a time to live.
+
+    Entries are keyed by a digest of the ciphertext, so the ciphertext itself
+    is not kept alive. Plaintext only ever lives in process memory.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()  # digest -> (plaintext, expires_at)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_decrypt(self, ciphertext, decrypt):
+        data = ciphertext.encode() if isinstance(ciphertext, str) else ciphertext
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        now = monotonic()
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is not None and entry[1] > now:
+                self.entries.move_to_end(digest)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Decrypt outside the lock; failures are not cached
+        plaintext = decrypt(ciphertext)
+        with self.lock:
+            self.entries[digest] = (plaintext, now + self.ttl)
+            self.entries.move_to_end(digest)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return plaintext
+
+    def stats(self):
+        with self.lock:
+            return {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+class CipherEngine:
+    """
+    Fernet key material for PII encryption, built once per process.
+
+    ENCRYPTION_KEYS is an ordered list: the first key encrypts, every key is
+    tried when decrypting. Rotating keys means putting the new key first,
+    re-encrypting existing rows (see the rotate_pii_keys command) and then
+    dropping the old key.
+    """
+
+    def __init__(self, keys, cipher='aes-gcm', index_key=None, cache_size=0, cache_ttl=300):
+        if not keys:
+            raise ImproperlyConfigured("ENCRYPTION_KEYS must contain at least one key")
+        if cipher not in CIPHERS:
+            raise ImproperlyConfigured(f"PII_CIPHER must be one of: {', '.join(CIPHERS)}")
+        keys = [key.encode() if isinstance(key, str) else key for key in keys]
+        self.fernets = [Fernet(key) for key in keys]
+        self.primary = self.fernets[0]
+        self.multi = MultiFernet(self.fernets)
+
+        # AES-GCM keys are looked up by id instead of trying each one in turn
+        self.format = CIPHERS[cipher]
+        self.aead_keys = {}
+        for key in keys:
+            aead_key = derive_aead_key(key)
+            key_id = hashlib.sha256(aead_key).digest()[:KEY_ID_SIZE]
+            self.aead_keys.setdefault(key_id, AESGCM(aead_key))
+        self.primary_key_id = next(iter(self.aead_keys))
+
+        # Blind indexes must not change when encryption keys rotate, so they
+        # use their own key
+        if isinstance(index_key, str):
+            index_key = index_key.encode()
+        self.index_key = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=b'talent-verify pii blind index',
+        ).derive(index_key or keys[0])
+
+        # Dropped together with the engine, so rotating keys clears it
+        self.cache = DecryptionCache(cache_size, cache_ttl) if cache_size > 0 else None
+
+    def encrypt(self, data: bytes) -> bytes:
+        return self.primary.encrypt(data)
+
+    def cached(self, ciphertext, decrypt):
+        """Return decrypt(ciphertext), from the decryption cache when it is enabled"""
+        if self.cache is None:
+            return decrypt(ciphertext)
+        return self.cache.get_or_decrypt(ciphertext, decrypt)
+
+    def decrypt(self, token: bytes) -> bytes:
+        """Decrypt with any configured key, raising InvalidToken if none match"""
+        return self.multi.decrypt(token)
+
+    def is_primary(self, token: bytes) -> bool:
+        """Whether a token is already encrypted with the primary key"""
+        try:
+            self.primary.decrypt(token)
+            return True
+        except InvalidToken:
+            return False
+
+    def rotate(self, token: bytes) -> bytes:
+        """Re-encrypt a token with the primary key"""
+        return self.multi.rotate(token)
+
+    def encrypt_blob(self, data: bytes) -> bytes:
+        """Encrypt data into the versioned binary format with the primary key"""
+        if self.format == FORMAT_FERNET:
+            token = base64.urlsafe_b64decode(self.primary.encrypt(data))
+            return bytes([FORMAT_FERNET]) + token
+
+        header = bytes([FORMAT_AESGCM]) + self.primary_key_id
+        nonce = os.urandom(NONCE_SIZE)
+        return header + nonce + self.aead_keys[self.primary_key_id].encrypt(nonce, data, header)
+
+    def decrypt_blob(self, blob) -> bytes:
+        """
+        Decrypt a versioned binary value, raising InvalidToken if no key matches.
+
+        The header, nonce and ciphertext are sliced out of one memoryview, so
+        AES-GCM values are decrypted without copying the stored bytes.
+        """
+        view = memoryview(blob)
+        if not view:
+            raise ValueError("Empty ciphertext")
+
+        if view[0] == FORMAT_AESGCM:
+            aead = self.aead_keys.get(bytes(view[1:AESGCM_HEADER_SIZE]))
+            if aead is None:
+                raise InvalidToken
+            nonce_end = AESGCM_HEADER_SIZE + NONCE_SIZE
+            try:
+                return aead.decrypt(view[AESGCM_HEADER_SIZE:nonce_end], view[nonce_end:], view[:AESGCM_HEADER_SIZE])
+            except InvalidTag:
+                raise InvalidToken
+        if view[0] == FORMAT_FERNET:
+            # Fernet only accepts base64 tokens
+            return self.multi.decrypt(base64.urlsafe_b64encode(view[1:]))
+        raise ValueError(f"Unknown ciphertext format {view[0]}")
+
+    def blind_index(self, value: str) -> str:
+        """Keyed HMAC of a normalized value, for equality lookups without decrypting"""
+        digest = hmac.new(self.index_key, normalize_for_index(value).encode(), hashlib.sha256)
+        return digest.hexdigest()[:BLIND_INDEX_LENGTH]
+
+    def is_current_blob(self, blob) -> bool:
+        """Whether a binary value already uses the configured format and primary key"""
+        view = memoryview(blob)
+        if not view or view[0] != self.format:
+            return False
+        if self.format == FORMAT_AESGCM:
+            return bytes(view[1:AESGCM_HEADER_SIZE]) == self.primary_key_id
+        return self.is_primary(base64.urlsafe_b64encode(view[1:]))
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def configured_keys():
+    return getattr(settings, 'ENCRYPTION_KEYS', None) or [settings.ENCRYPTION_KEY]
+
+def get_cipher_engine() -> CipherEngine:
+    """Return the process-wide cipher engine, building it on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = CipherEngine(
+                    configured_keys(),
+                    getattr(settings, 'PII_CIPHER', 'aes-gcm'),
+                    getattr(settings, 'BLIND_INDEX_KEY', None),
+                    getattr(settings, 'PII_DECRYPT_CACHE_SIZE', 0),
+                    getattr(settings, 'PII_DECRYPT_CACHE_TTL', 300),
+                )
+    return _engine
+
+def reset_cipher_engine():
+    """Drop the cached engine so the next call picks up the current keys"""
+    global _engine
+    with _engine_lock:
+        _engine = None
+
+def worker_settings():
+    """The key settings a worker process needs to read and write the same ciphertexts and indexes"""
+    keys = configured_keys()
+    return {
+        'ENCRYPTION_KEY': keys[0],
+        'ENCRYPTION_KEYS': keys,
+        'PII_CIPHER': getattr(settings, 'PII_CIPHER', 'aes-gcm'),
+        'BLIND_INDEX_KEY': getattr(settings, 'BLIND_INDEX_KEY', None),
+    }
+
+def init_worker(key_settings):
+    """
+    Set up Django in a freshly spawned worker with the parent's worker_settings().
+
+    Keys that are generated at startup when not configured would otherwise
+    differ in every process, and so would the blind indexes.
+    """
+    django.setup()
+    for name, value in key_settings.items():
+        setattr(settings, name, value)
+    reset_cipher_engine()
+
+def decryption_cache_stats():
+    """Hit and miss counters of this process's decryption cache, or None when it is disabled"""
+    cache = get_cipher_engine().cache
+    return cache.stats() if cache is not None else None
+
+@receiver(setting_changed)
+def reset_on_key_change(setting, **kwargs):
+    if setting in (
+        'ENCRYPTION_KEY', 'ENCRYPTION_KEYS', 'PII_CIPHER', 'BLIND_INDEX_KEY',
+        'PII_DECRYPT_CACHE_SIZE', 'PII_DECRYPT_CACHE_TTL',
+    ):
+        reset_cipher_engine()
@@ -0,0 +1,9 @@
+from employees.pii_maintenance import index_range
+from .rotate_pii_keys import Command as RotateCommand
+
+class Command(RotateCommand):
+    help = 'Recompute the blind indexes and name search tokens of employee PII'
+
+    range_function = staticmethod(index_range)
+    action = 'indexed'
+    done_message = 'All employee blind indexes are up to date'
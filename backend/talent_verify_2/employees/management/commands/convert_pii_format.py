@@ -0,0 +1,9 @@
+from employees.pii_maintenance import convert_range
+from .rotate_pii_keys import Command as RotateCommand
+
+class Command(RotateCommand):
+    help = 'Move employee PII from the legacy base64 text columns to the binary columns'
+
+    range_function = staticmethod(convert_range)
+    action = 'converted'
+    done_message = 'All employee PII is stored in the binary format'
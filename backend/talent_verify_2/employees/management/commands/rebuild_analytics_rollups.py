@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from employees.rollups import rebuild_rollups
+
+class Command(BaseCommand):
+    help = 'Recompute the employee analytics rollups from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, action='append', dest='companies', help='Only rebuild this company id (repeatable)')
+
+    def handle(self, *args, **options):
+        rebuild_rollups(options['companies'])
+        scope = f"{len(options['companies'])} companies" if options['companies'] else 'all companies'
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt employee analytics rollups for {scope}'))
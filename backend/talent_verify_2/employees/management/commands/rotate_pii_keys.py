@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from employees.models import Employee
+from employees.pii_maintenance import rotate_range, run_ranges, split_ranges
+
+class Command(BaseCommand):
+    help = 'Re-encrypt employee PII columns with the primary key in ENCRYPTION_KEYS'
+
+    range_function = staticmethod(rotate_range)
+    action = 're-encrypted'
+    done_message = 'All employee PII is encrypted with the primary key'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Employees updated per statement')
+        parser.add_argument('--workers', type=int, default=1, help='Parallel worker processes')
+        parser.add_argument('--start-id', type=int, default=None, help='Resume from this employee id')
+
+    def handle(self, *args, **options):
+        bounds = Employee.objects.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            self.stdout.write(self.style.WARNING('No employees to process'))
+            return
+
+        workers = max(options['workers'], 1)
+        ranges = split_ranges(options['start_id'] or bounds['first'], bounds['last'], workers)
+        results = run_ranges(self.range_function, ranges, options['batch_size'], workers)
+
+        for (start, end), stats in zip(ranges, results):
+            self.stdout.write(
+                f"ids {start}-{end}: {stats['values']} values {self.action} on {stats['employees']} employees, "
+                f"{stats['failed']} could not be decrypted (last id {stats['last_id']})"
+            )
+
+        failed = sum(stats['failed'] for stats in results)
+        if failed:
+            self.stdout.write(self.style.WARNING(
+                f'{failed} values could not be decrypted with any configured key and were left unchanged'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(self.done_message))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulk_operations', '0005_rolled_back_status'),
+        ('employees', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='bulk_job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_employees', to='bulk_operations.bulkuploadjob'),
+        ),
+        migrations.AddField(
+            model_name='employeeposition',
+            name='bulk_job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_positions', to='bulk_operations.bulkuploadjob'),
+        ),
+    ]
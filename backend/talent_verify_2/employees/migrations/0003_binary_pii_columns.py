@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_bulk_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='encrypted_email_bin',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='encrypted_employee_id_bin',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='encrypted_name_bin',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='encrypted_phone_bin',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_bulk_job'),
+        ('employees', '0004_blind_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token_hash', models.CharField(max_length=32)),
+                ('is_word', models.BooleanField(default=False)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='companies.company')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='employees.employee')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', 'token_hash'], name='employees_e_company_b6f65b_idx')],
+                'unique_together': {('employee', 'token_hash')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def set_current_positions(apps, schema_editor):
+    Employee = apps.get_model('employees', 'Employee')
+    EmployeePosition = apps.get_model('employees', 'EmployeePosition')
+    current = EmployeePosition.objects.filter(
+        employee=OuterRef('pk'), is_current=True
+    ).order_by('-start_date', '-pk').values('pk')[:1]
+    Employee.objects.update(current_position=Subquery(current))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0005_search_tokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='current_position',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='employees.employeeposition'),
+        ),
+        migrations.RunPython(set_current_positions, migrations.RunPython.noop),
+    ]
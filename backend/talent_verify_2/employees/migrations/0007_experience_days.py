@@ -0,0 +1,54 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:12
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Func, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+class DaysBetween(Func):
+    # A frozen copy of employees.models.DaysBetween
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+    output_field = models.IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(',
+            **extra_context
+        )
+
+
+def fill_experience_days(apps, schema_editor):
+    Employee = apps.get_model('employees', 'Employee')
+    EmployeePosition = apps.get_model('employees', 'EmployeePosition')
+    closed_days = EmployeePosition.objects.filter(
+        employee=OuterRef('pk'), end_date__isnull=False
+    ).values('employee').annotate(days=Sum(DaysBetween('end_date', 'start_date'))).values('days')
+    Employee.objects.update(total_experience_days=Coalesce(Subquery(closed_days), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulk_operations', '0005_rolled_back_status'),
+        ('companies', '0002_bulk_job'),
+        ('employees', '0006_current_position_pointer'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='total_experience_days',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['company', 'total_experience_days'], name='employees_e_company_722fd0_idx'),
+        ),
+        migrations.RunPython(fill_experience_days, migrations.RunPython.noop),
+    ]
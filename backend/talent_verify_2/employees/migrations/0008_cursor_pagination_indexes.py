@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulk_operations', '0005_rolled_back_status'),
+        ('companies', '0002_bulk_job'),
+        ('employees', '0007_experience_days'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['company', '-created_at', 'id'], name='employees_e_company_b38f15_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['-created_at', 'id'], name='employees_e_created_c3e3ec_idx'),
+        ),
+    ]
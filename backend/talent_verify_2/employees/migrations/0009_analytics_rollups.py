@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_bulk_job'),
+        ('employees', '0008_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeAnalyticsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('employment_type', models.CharField(blank=True, max_length=50)),
+                ('headcount', models.IntegerField(default=0)),
+                ('active_count', models.IntegerField(default=0)),
+                ('tenure_count', models.IntegerField(default=0)),
+                ('tenure_start_days', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analytics_rollups', to='companies.company')),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='companies.department')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', 'department', 'employment_type'], name='employees_e_company_0a2e07_idx')],
+            },
+        ),
+    ]
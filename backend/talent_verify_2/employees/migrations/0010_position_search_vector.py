@@ -0,0 +1,59 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:22
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Kept in sync with employees.models.POSITION_SEARCH_CONFIG
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce({table}role, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce({table}duties, '')), 'B')"
+)
+
+CREATE_SQL = [
+    f"""
+    CREATE FUNCTION employees_position_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {SEARCH_DOCUMENT.format(table='NEW.')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER employees_position_search_vector
+    BEFORE INSERT OR UPDATE OF role, duties ON employees_employeeposition
+    FOR EACH ROW EXECUTE FUNCTION employees_position_search_vector()
+    """,
+    f"UPDATE employees_employeeposition SET search_vector = {SEARCH_DOCUMENT.format(table='')}",
+    "CREATE INDEX employees_position_search_gin ON employees_employeeposition USING gin (search_vector)",
+]
+
+DROP_SQL = [
+    "DROP INDEX IF EXISTS employees_position_search_gin",
+    "DROP TRIGGER IF EXISTS employees_position_search_vector ON employees_employeeposition",
+    "DROP FUNCTION IF EXISTS employees_position_search_vector()",
+]
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        # Other backends keep the column NULL and search with LIKE instead
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0009_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeeposition',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(run_on_postgresql(CREATE_SQL), run_on_postgresql(DROP_SQL)),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:30
+
+from django.db import migrations
+
+def create_index(apps, schema_editor):
+    # Serves positions__role__icontains (UPPER(role) LIKE ...) on PostgreSQL
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX employees_position_role_trgm ON employees_employeeposition '
+        'USING gin (UPPER(role::text) gin_trgm_ops)'
+    )
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS employees_position_role_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0003_trigram_indexes'),
+        ('employees', '0010_position_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
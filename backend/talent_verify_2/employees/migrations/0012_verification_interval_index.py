@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulk_operations', '0005_rolled_back_status'),
+        ('companies', '0003_trigram_indexes'),
+        ('employees', '0011_position_role_trigram_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employeeposition',
+            index=models.Index(fields=['employee', 'start_date', 'end_date'], name='employees_e_employe_dcbda2_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-19 05:02
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def clamp_end_dates(apps, schema_editor):
+    # Positions closed before they started (add_position used to allow it)
+    # end on their start date instead; their holders' closed totals are
+    # recomputed because the negative lengths were summed into them
+    Employee = apps.get_model('employees', 'Employee')
+    EmployeePosition = apps.get_model('employees', 'EmployeePosition')
+    inverted = EmployeePosition.objects.filter(end_date__lt=F('start_date'))
+    employee_ids = set(inverted.values_list('employee_id', flat=True))
+    if not employee_ids:
+        return
+    inverted.update(end_date=F('start_date'))
+
+    totals = dict.fromkeys(employee_ids, 0)
+    for employee_id, start_date, end_date in EmployeePosition.objects.filter(
+        employee_id__in=employee_ids, end_date__isnull=False
+    ).values_list('employee_id', 'start_date', 'end_date'):
+        totals[employee_id] += (end_date - start_date).days
+    Employee.objects.bulk_update(
+        [Employee(pk=employee_id, total_experience_days=days) for employee_id, days in totals.items()],
+        ['total_experience_days'],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0012_verification_interval_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(clamp_end_dates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='employeeposition',
+            constraint=models.CheckConstraint(
+                condition=models.Q(('end_date__isnull', True), ('end_date__gte', models.F('start_date')), _connector='OR'),
+                name='employees_position_end_after_start',
+            ),
+        ),
+    ]
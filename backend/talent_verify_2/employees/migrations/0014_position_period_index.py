@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:35
+
+from django.db import migrations
+
+def create_index(apps, schema_editor):
+    # Serves EmployeePositionQuerySet.active_on (daterange containment) on PostgreSQL
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX employees_position_period_gist ON employees_employeeposition '
+        "USING gist (daterange(start_date, end_date, '[]'))"
+    )
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS employees_position_period_gist')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0013_position_date_order'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,10 +1,33 @@
 # backend/employees/models.py
-from django.db import models
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.postgres.fields import DateRangeField
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connections, models
+from django.db.models import F, Func, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from datetime import date
 from authentication.models import User
 from companies.models import Company, Department
-from cryptography.fernet import Fernet
-from django.conf import settings
+from companies.versions import bump_company_versions
+from cryptography.fernet import InvalidToken
+from .encryption import edge_ngrams, get_cipher_engine, normalize_for_index
 import base64
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+def track_rollups(employee):
+    # rollups.py imports the models in this module, so load it on first use
+    from . import rollups
+    return rollups.track_rollups(employee)
+
+PII_FIELDS = ['name', 'employee_id', 'email', 'phone']
+BLIND_INDEX_FIELDS = ['name', 'employee_id', 'email']
+# Text search configuration of EmployeePosition.search_vector; the trigger
+# in migration 0010 uses the same one
+POSITION_SEARCH_CONFIG = 'english'
 
 class EncryptedField:
     """Custom field for encrypting sensitive data"""
@@ -14,9 +37,7 @@ class EncryptedField:
         if not value:
             return value
             
-        key = settings.ENCRYPTION_KEY.encode()
-        f = Fernet(key)
-        encrypted_value = f.encrypt(value.encode())
+        encrypted_value = get_cipher_engine().encrypt(value.encode())
         return base64.urlsafe_b64encode(encrypted_value).decode()
     
     @staticmethod
@@ -25,12 +46,185 @@ class EncryptedField:
             return encrypted_value
             
         try:
-            key = settings.ENCRYPTION_KEY.encode()
-            f = Fernet(key)
-            decoded_value = base64.urlsafe_b64decode(encrypted_value.encode())
-            return f.decrypt(decoded_value).decode()
-        except:
-            return encrypted_value  # Return as-is if decryption fails
+            return get_cipher_engine().cached(encrypted_value, EncryptedField.decrypt_legacy)
+        except (InvalidToken, ValueError):
+            # Never hand back ciphertext as if it were the value; like
+            # decrypt_bytes, an undecryptable value (usually a key missing
+            # from ENCRYPTION_KEYS) reads as empty
+            logger.warning("Could not decrypt value with any configured encryption key")
+            return ''
+    
+    @staticmethod
+    def decrypt_legacy(encrypted_value):
+        """Decrypt a base64 text value, raising InvalidToken if no key matches"""
+        decoded_value = base64.urlsafe_b64decode(encrypted_value.encode())
+        return get_cipher_engine().decrypt(decoded_value).decode()
+    
+    @staticmethod
+    def encrypt_bytes(value):
+        """Encrypt a value into the versioned binary format"""
+        if not value:
+            return None
+        return get_cipher_engine().encrypt_blob(value.encode())
+    
+    @staticmethod
+    def decrypt_bytes(blob):
+        if not blob:
+            return ''
+        
+        engine = get_cipher_engine()
+        try:
+            return engine.cached(blob, lambda value: engine.decrypt_blob(value).decode())
+        except (InvalidToken, ValueError):
+            logger.warning("Could not decrypt binary value with any configured encryption key")
+            return ''
+    
+    @staticmethod
+    def rotate_bytes(blob):
+        """Re-encrypt a binary value with the configured format and primary key"""
+        if not blob:
+            return blob
+        
+        engine = get_cipher_engine()
+        if engine.is_current_blob(blob):
+            return blob
+        return engine.encrypt_blob(engine.decrypt_blob(blob))
+    
+    @staticmethod
+    def rotate(encrypted_value):
+        """Re-encrypt a stored value with the primary key; raises InvalidToken if no key matches"""
+        if not encrypted_value:
+            return encrypted_value
+        
+        engine = get_cipher_engine()
+        decoded_value = base64.urlsafe_b64decode(encrypted_value.encode())
+        if engine.is_primary(decoded_value):
+            return encrypted_value
+        return base64.urlsafe_b64encode(engine.rotate(decoded_value)).decode()
+
+_decrypt_pool = None
+_decrypt_pool_lock = threading.Lock()
+
+def get_decrypt_pool():
+    global _decrypt_pool
+    if _decrypt_pool is None:
+        with _decrypt_pool_lock:
+            if _decrypt_pool is None:
+                _decrypt_pool = ThreadPoolExecutor(
+                    max_workers=settings.PII_DECRYPT_THREADS, thread_name_prefix='pii-decrypt'
+                )
+    return _decrypt_pool
+
+def decrypt_employees(employees, fields=PII_FIELDS):
+    """
+    Decrypt the PII of many employees in one pass and attach the plaintext.
+
+    Every ciphertext is collected first and decrypted as one batch, spread over
+    a thread pool when the batch is large (the cryptography primitives release
+    the GIL). The name/email/phone/employee_id properties then read the
+    attached values instead of decrypting field by field.
+    """
+    employees = list(employees)
+    pending = [
+        (employee, field)
+        for employee in employees
+        for field in fields
+        if field not in employee.__dict__.setdefault('_decrypted_pii', {})
+    ]
+    if not pending:
+        return employees
+
+    def decrypt_slice(items):
+        return [employee.decrypt_pii(field) for employee, field in items]
+
+    workers = settings.PII_DECRYPT_THREADS
+    if workers > 1 and len(pending) >= settings.PII_DECRYPT_PARALLEL_MIN:
+        size = -(-len(pending) // workers)
+        slices = [pending[i:i + size] for i in range(0, len(pending), size)]
+        values = [value for part in get_decrypt_pool().map(decrypt_slice, slices) for value in part]
+    else:
+        values = decrypt_slice(pending)
+
+    for (employee, field), value in zip(pending, values):
+        employee._decrypted_pii[field] = value
+    return employees
+
+class DaysBetween(Func):
+    """Whole days from the first date expression to the second"""
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+    output_field = models.IntegerField()
+
+    def __init__(self, end, start, **extra):
+        super().__init__(end, start, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(',
+            **extra_context
+        )
+
+class PositionPeriod(Func):
+    """
+    The inclusive daterange of a position; open positions are unbounded.
+    Matches the GiST expression index of migration 0014 on PostgreSQL.
+    """
+    function = 'daterange'
+    template = "%(function)s(%(expressions)s, '[]')"
+    output_field = DateRangeField()
+
+    def __init__(self, **extra):
+        super().__init__('start_date', 'end_date', **extra)
+
+def position_days(today=None):
+    """Length of a position in days, counting open positions up to today"""
+    today = Value(today or date.today(), output_field=models.DateField())
+    return DaysBetween(Coalesce('end_date', today), 'start_date')
+
+class EmployeeQuerySet(models.QuerySet):
+    def for_serializer(self):
+        """Load everything EmployeeSerializer reads, in a fixed number of queries"""
+        return self.select_related('company', 'current_position__department').prefetch_related(
+            'positions__department', 'documents__uploaded_by', 'documents__verified_by'
+        )
+
+    def with_experience(self):
+        """
+        Annotate experience_days: the stored closed-position total plus the
+        open positions counted up to today.
+        """
+        open_days = EmployeePosition.objects.filter(
+            employee=OuterRef('pk'), end_date__isnull=True
+        ).values('employee').annotate(days=Sum(position_days())).values('days')
+        return self.annotate(
+            experience_days=F('total_experience_days') + Coalesce(Subquery(open_days), 0)
+        )
+
+    def experience_at_least(self, days):
+        """
+        Employees with at least this many days of experience.
+
+        No employee's open positions add more days than the largest open total
+        in the queryset, so total_experience_days >= days minus that total is a
+        plain range prefilter the (company, total_experience_days) index can
+        serve; with_experience() then checks the survivors exactly.
+        """
+        max_open_days = EmployeePosition.objects.filter(
+            employee__in=self.values('pk'), end_date__isnull=True
+        ).values('employee').annotate(days=Sum(position_days())).order_by('-days').values('days')[:1]
+        return self.filter(
+            total_experience_days__gte=Value(days) - Coalesce(Subquery(max_open_days), 0)
+        ).with_experience().filter(experience_days__gte=days)
+
+    def refresh_experience(self):
+        """Recompute total_experience_days from the closed positions"""
+        closed_days = EmployeePosition.objects.filter(
+            employee=OuterRef('pk'), end_date__isnull=False
+        ).values('employee').annotate(days=Sum(position_days())).values('days')
+        return self.update(total_experience_days=Coalesce(Subquery(closed_days), 0))
 
 class Employee(models.Model):
     company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='employees')
@@ -41,58 +235,208 @@ class Employee(models.Model):
     encrypted_email = models.TextField(blank=True)  # Encrypted email
     encrypted_phone = models.TextField(blank=True)  # Encrypted phone
 
+    # Versioned binary ciphertext; the text columns above are only read for
+    # rows that have not been converted yet (see the convert_pii_format command)
+    encrypted_name_bin = models.BinaryField(null=True, blank=True)
+    encrypted_employee_id_bin = models.BinaryField(null=True, blank=True)
+    encrypted_email_bin = models.BinaryField(null=True, blank=True)
+    encrypted_phone_bin = models.BinaryField(null=True, blank=True)
+
+    # Keyed hashes of the normalized values for exact-match search
+    name_index = models.CharField(max_length=32, blank=True, editable=False)
+    employee_id_index = models.CharField(max_length=32, blank=True, editable=False)
+    email_index = models.CharField(max_length=32, blank=True, editable=False)
+
     # Non-encrypted metadata
     is_active = models.BooleanField(default=True)
     date_joined = models.DateField(auto_now_add=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    bulk_job = models.ForeignKey('bulk_operations.BulkUploadJob', on_delete=models.SET_NULL, null=True, blank=True, related_name='created_employees')
+    # Days worked in positions with an end date; maintained by EmployeePosition
+    total_experience_days = models.IntegerField(default=0, editable=False)
+    # Maintained by EmployeePosition.save
+    current_position = models.ForeignKey(
+        'EmployeePosition',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+'
+    )
+
+    objects = EmployeeQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['company', 'is_active']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['company', 'name_index']),
+            models.Index(fields=['company', 'employee_id_index']),
+            models.Index(fields=['company', 'email_index']),
+            models.Index(fields=['company', 'total_experience_days']),
+            models.Index(fields=['company', '-created_at', 'id']),
+            models.Index(fields=['-created_at', 'id']),
         ]
 
     def __str__(self):
         return f"{self.name} - {self.company.name}"
     
+    def read_pii(self, field):
+        decrypted = self.__dict__.get('_decrypted_pii')
+        if decrypted is not None and field in decrypted:
+            return decrypted[field]
+        return self.decrypt_pii(field)
+    
+    def decrypt_pii(self, field):
+        blob = getattr(self, f'encrypted_{field}_bin')
+        if blob:
+            return EncryptedField.decrypt_bytes(blob)
+        return EncryptedField.decrypt(getattr(self, f'encrypted_{field}'))
+    
+    def write_pii(self, field, value):
+        self.__dict__.get('_decrypted_pii', {}).pop(field, None)
+        setattr(self, f'encrypted_{field}_bin', EncryptedField.encrypt_bytes(value))
+        setattr(self, f'encrypted_{field}', '')
+        if field in BLIND_INDEX_FIELDS:
+            setattr(self, f'{field}_index', Employee.blind_index(value))
+        if field == 'name':
+            self._search_tokens_stale = True
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Search tokens carry the company, so moving the employee rebuilds them
+        instance._loaded_company_id = instance.__dict__.get('company_id')
+        return instance
+    
+    def refresh_from_db(self, *args, **kwargs):
+        self.__dict__.pop('_decrypted_pii', None)
+        super().refresh_from_db(*args, **kwargs)
+    
+    def save(self, *args, **kwargs):
+        loaded_company_id = getattr(self, '_loaded_company_id', None)
+        if loaded_company_id is not None and loaded_company_id != self.company_id:
+            self._search_tokens_stale = True
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Never write back position-derived columns that were loaded before
+            # a position changed
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in ('current_position', 'total_experience_days')
+                and field.attname not in deferred
+            ]
+        with track_rollups(self):
+            super().save(*args, **kwargs)
+        if getattr(self, '_search_tokens_stale', False):
+            self.update_search_tokens()
+        bump_company_versions([self.company_id, loaded_company_id])
+        self._loaded_company_id = self.company_id
+    
+    def delete(self, *args, **kwargs):
+        bump_company_versions([self.company_id])
+        with track_rollups(self):
+            return super().delete(*args, **kwargs)
+    
+    def update_search_tokens(self):
+        """Replace the name search tokens if they changed; returns whether they did"""
+        self._search_tokens_stale = False
+        engine = get_cipher_engine()
+        grams = edge_ngrams(self.name or '', settings.SEARCH_TOKEN_MIN_LENGTH)
+        tokens = {engine.blind_index(gram): is_word for gram, is_word in grams.items()}
+        existing = dict(self.search_tokens.filter(company_id=self.company_id).values_list('token_hash', 'is_word'))
+        if tokens == existing:
+            return False
+        
+        self.search_tokens.all().delete()
+        EmployeeSearchToken.objects.bulk_create([
+            EmployeeSearchToken(employee=self, company_id=self.company_id, token_hash=token_hash, is_word=is_word)
+            for token_hash, is_word in tokens.items()
+        ])
+        return True
+    
+    @staticmethod
+    def blind_index(value):
+        return get_cipher_engine().blind_index(value) if value else ''
+    
     @property
     def name(self):
-        return EncryptedField.decrypt(self.encrypted_name)
+        return self.read_pii('name')
     
     @name.setter
     def name(self, value):
-        self.encrypted_name = EncryptedField.encrypt(value)
+        self.write_pii('name', value)
     
     @property
     def employee_id(self):
-        return EncryptedField.decrypt(self.encrypted_employee_id)
+        return self.read_pii('employee_id')
     
     @employee_id.setter
     def employee_id(self, value):
-        self.encrypted_employee_id = EncryptedField.encrypt(value)
+        self.write_pii('employee_id', value)
     
     @property
     def email(self):
-        return EncryptedField.decrypt(self.encrypted_email)
+        return self.read_pii('email')
     
     @email.setter
     def email(self, value):
-        self.encrypted_email = EncryptedField.encrypt(value)
+        self.write_pii('email', value)
     
     @property
     def phone(self):
-        return EncryptedField.decrypt(self.encrypted_phone)
+        return self.read_pii('phone')
     
     @phone.setter
     def phone(self, value):
-        self.encrypted_phone = EncryptedField.encrypt(value)
+        self.write_pii('phone', value)
 
-    @property
-    def current_position(self):
-        return self.positions.filter(is_current=True).first()
+class EmployeeSearchToken(models.Model):
+    """Blind-indexed words and edge n-grams of an employee name, for prefix search"""
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='search_tokens')
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='+')
+    token_hash = models.CharField(max_length=32)
+    is_word = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ['employee', 'token_hash']
+        indexes = [
+            models.Index(fields=['company', 'token_hash']),
+        ]
+
+    @classmethod
+    def matching(cls, term, company=None):
+        """
+        Employees with a name word starting with every word of term.
+
+        Returns employee_id and a rank counting the term words that matched a
+        whole word, so exact words sort above prefixes.
+        """
+        engine = get_cipher_engine()
+        words = normalize_for_index(term).split()
+        # Words shorter than the shortest stored prefix can only match whole
+        # words, so they are ignored when the term has longer ones
+        words = [word for word in words if len(word) >= settings.SEARCH_TOKEN_MIN_LENGTH] or words
+        hashes = {engine.blind_index(word) for word in words}
+        tokens = cls.objects.filter(token_hash__in=hashes)
+        if company is not None:
+            tokens = tokens.filter(company=company)
+        return tokens.values('employee_id').annotate(
+            matched=models.Count('pk'),
+            rank=models.Count('pk', filter=models.Q(is_word=True)),
+        ).filter(matched=len(hashes))
+
+class EmployeePositionQuerySet(models.QuerySet):
+    def active_on(self, day):
+        """Positions held on day, start and end dates included"""
+        if connections[self.db].vendor == 'postgresql':
+            # Containment in the indexed daterange expression
+            return self.alias(period=PositionPeriod()).filter(period__contains=day)
+        return self.filter(Q(end_date__isnull=True) | Q(end_date__gte=day), start_date__lte=day)
 
 class EmployeePosition(models.Model):
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='positions')
@@ -123,26 +467,94 @@ class EmployeePosition(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    bulk_job = models.ForeignKey('bulk_operations.BulkUploadJob', on_delete=models.SET_NULL, null=True, blank=True, related_name='created_positions')
+    # Weighted role + duties lexemes. On PostgreSQL a trigger keeps this up to
+    # date and it has a GIN index (migration 0010); it stays NULL elsewhere.
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+
+    objects = EmployeePositionQuerySet.as_manager()
 
     class Meta:
         ordering = ['-start_date']
         indexes = [
             models.Index(fields=['employee', 'is_current']),
             models.Index(fields=['start_date', 'end_date']),
+            # Per-employee interval lookups of employment verification
+            models.Index(fields=['employee', 'start_date', 'end_date']),
+        ]
+        constraints = [
+            # daterange() rejects a lower bound after the upper one
+            models.CheckConstraint(
+                condition=Q(end_date__isnull=True) | Q(end_date__gte=F('start_date')),
+                name='employees_position_end_after_start',
+            ),
         ]
 
     def __str__(self):
         return f"{self.employee.name} - {self.role} ({self.start_date})"
     
     def save(self, *args, **kwargs):
-        # Ensure only one current position per employee
-        if self.is_current:
-            EmployeePosition.objects.filter(
-                employee=self.employee,
-                is_current=True
-            ).exclude(pk=self.pk).update(is_current=False)
+        # New open positions add nothing to the stored closed-position total
+        refresh_experience = self.end_date is not None or not self._state.adding
+        
+        with track_rollups(self.employee_id):
+            # Ensure only one current position per employee
+            if self.is_current:
+                EmployeePosition.objects.filter(
+                    employee=self.employee,
+                    is_current=True
+                ).exclude(pk=self.pk).update(is_current=False)
+            
+            super().save(*args, **kwargs)
+            
+            # Keep the employee's current position pointer in sync
+            if self.is_current:
+                Employee.objects.filter(pk=self.employee_id).update(current_position=self)
+                current = self
+            else:
+                Employee.objects.filter(pk=self.employee_id, current_position=self).update(current_position=None)
+                current = None
+        if EmployeePosition.employee.is_cached(self) and (current or self.employee.current_position_id == self.pk):
+            self.employee.current_position = current
         
-        super().save(*args, **kwargs)
+        if refresh_experience:
+            Employee.objects.filter(pk=self.employee_id).refresh_experience()
+        bump_company_versions([self.employee.company_id])
+    
+    def delete(self, *args, **kwargs):
+        bump_company_versions([self.employee.company_id])
+        with track_rollups(self.employee_id):
+            result = super().delete(*args, **kwargs)
+        Employee.objects.filter(pk=self.employee_id).refresh_experience()
+        return result
+
+class EmployeeAnalyticsRollup(models.Model):
+    """
+    Employee counts per company, current department and employment type.
+
+    Employees without a current position are counted in the row with no
+    department and an empty employment type. Tenure is kept as the sum of
+    the current position start dates of active employees, in days since
+    ROLLUP_EPOCH, so the average can be computed for any day. Rows are
+    adjusted by the employee and position write paths (see rollups.py);
+    the rebuild_analytics_rollups command recomputes them.
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='analytics_rollups')
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    employment_type = models.CharField(max_length=50, blank=True)
+    headcount = models.IntegerField(default=0)
+    active_count = models.IntegerField(default=0)
+    tenure_count = models.IntegerField(default=0)
+    tenure_start_days = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'department', 'employment_type']),
+        ]
+
+    def __str__(self):
+        return f"{self.company_id} / {self.department_id} / {self.employment_type}: {self.headcount}"
 
 class EmployeeDocument(models.Model):
     """Store employee documents and certifications"""
@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.expressions import RawSQL
+from companies.versions import company_version
+from .models import Employee, EmployeePosition, decrypt_employees
+
+def subtree_ids(position_id, max_depth):
+    """A recursive CTE selecting a position and the current positions reporting to it"""
+    table = EmployeePosition._meta.db_table
+    # The depth bound also stops cycles in the manager links
+    return RawSQL(
+        f"""
+        WITH RECURSIVE org (id, depth) AS (
+            SELECT id, 0 FROM {table} WHERE id = %s
+            UNION ALL
+            SELECT report.id, org.depth + 1
+            FROM {table} report JOIN org ON report.manager_id = org.id
+            WHERE report.is_current AND org.depth < %s
+        )
+        SELECT id FROM org
+        """,
+        [position_id, max_depth],
+    )
+
+def org_chart(position, company_id, depth=None):
+    """
+    The reporting tree under a position, as nested direct_reports.
+
+    The whole tree is read with one query (the CTE runs as a subquery) and
+    its structure is cached under the company's data version, so any employee
+    or position write in the company rebuilds it on the next request. Names
+    never go into the shared cache; they are decrypted on every request.
+    """
+    depth = min(depth or settings.ORG_CHART_MAX_DEPTH, settings.ORG_CHART_MAX_DEPTH)
+    key = f'org-chart:{company_id}:{company_version(company_id)}:{position.pk}:{depth}'
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_tree(position.pk, company_id, depth)
+        cache.set(key, tree, settings.ORG_CHART_CACHE_TTL)
+    if tree is not None:
+        add_names(tree)
+    return tree
+
+def build_tree(position_id, company_id, depth):
+    positions = list(
+        EmployeePosition.objects.filter(
+            pk__in=subtree_ids(position_id, depth),
+            employee__company_id=company_id,
+        ).select_related('department').order_by('role', 'pk')
+    )
+
+    nodes = {
+        position.pk: {
+            'position': position.pk,
+            'employee': position.employee_id,
+            'name': '',  # Filled in by add_names after the cache
+            'role': position.role,
+            'department': position.department.name,
+            'direct_reports': [],
+        }
+        for position in positions
+    }
+    for position in positions:
+        if position.pk != position_id and position.manager_id in nodes:
+            nodes[position.manager_id]['direct_reports'].append(nodes[position.pk])
+    return nodes.get(position_id)
+
+def add_names(tree):
+    """Decrypt the employee names of a tree in one query and one batch"""
+    nodes = []
+    pending = [tree]
+    while pending:
+        node = pending.pop()
+        nodes.append(node)
+        pending.extend(node['direct_reports'])
+
+    employees = Employee.objects.filter(pk__in={node['employee'] for node in nodes}).only(
+        'encrypted_name', 'encrypted_name_bin'
+    )
+    names = {employee.pk: employee.name for employee in decrypt_employees(employees, ['name'])}
+    for node in nodes:
+        node['name'] = names.get(node['employee'], '')
@@ -0,0 +1,142 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from cryptography.fernet import InvalidToken
+from django.db import connections, transaction
+from .encryption import init_worker, worker_settings
+
+# Batch jobs over the encrypted employee columns, shared by the rotate_pii_keys,
+# convert_pii_format and backfill_blind_indexes commands. Models are imported inside the functions:
+# spawned workers import this module before init_worker has set Django up.
+
+def split_ranges(start_id, end_id, workers):
+    """Split an id range into one contiguous range per worker"""
+    step = max((end_id - start_id + 1) // workers, 1)
+    ranges = []
+    range_start = start_id
+    while range_start <= end_id:
+        range_end = end_id if len(ranges) == workers - 1 else min(range_start + step - 1, end_id)
+        ranges.append((range_start, range_end))
+        range_start = range_end + 1
+    return ranges
+
+def run_ranges(func, ranges, batch_size, workers):
+    """Run func over each range, in worker processes when workers > 1"""
+    if workers == 1:
+        return [func(start, end, batch_size) for start, end in ranges]
+
+    connections.close_all()
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(
+        max_workers=len(ranges),
+        mp_context=context,
+        initializer=init_worker,
+        initargs=(worker_settings(),),
+    ) as executor:
+        futures = [executor.submit(func, start, end, batch_size) for start, end in ranges]
+        return [future.result() for future in futures]
+
+def process_range(start_id, end_id, batch_size, update_employee):
+    """
+    Walk employees with start_id <= id <= end_id in pk order and save the ones
+    update_employee changed.
+
+    update_employee returns (values changed, values that failed). Each batch is
+    written with one bulk_update in its own transaction, so an interrupted run
+    can be resumed from the last id it reported.
+    """
+    from .models import Employee, PII_FIELDS, BLIND_INDEX_FIELDS
+
+    columns = (
+        [f'encrypted_{field}' for field in PII_FIELDS]
+        + [f'encrypted_{field}_bin' for field in PII_FIELDS]
+        + [f'{field}_index' for field in BLIND_INDEX_FIELDS]
+    )
+    stats = {'employees': 0, 'values': 0, 'failed': 0, 'last_id': None}
+    last_id = start_id - 1
+    try:
+        while True:
+            employees = list(
+                Employee.objects.filter(pk__gt=last_id, pk__lte=end_id)
+                .order_by('pk')
+                .only('pk', 'company', *columns)[:batch_size]
+            )
+            if not employees:
+                break
+
+            changed = []
+            for employee in employees:
+                values, failed = update_employee(employee)
+                stats['values'] += values
+                stats['failed'] += failed
+                if values:
+                    changed.append(employee)
+
+            with transaction.atomic():
+                Employee.objects.bulk_update(changed, columns)
+
+            stats['employees'] += len(changed)
+            last_id = stats['last_id'] = employees[-1].pk
+    finally:
+        connections.close_all()
+    return stats
+
+def rotate_employee(employee):
+    """Re-encrypt every PII value of an employee with the primary key"""
+    from .models import EncryptedField, PII_FIELDS
+
+    values = failed = 0
+    for field in PII_FIELDS:
+        for column, rotate in [
+            (f'encrypted_{field}_bin', EncryptedField.rotate_bytes),
+            (f'encrypted_{field}', EncryptedField.rotate),
+        ]:
+            value = getattr(employee, column)
+            try:
+                rotated = rotate(value)
+            except (InvalidToken, ValueError):
+                failed += 1
+                continue
+            if rotated != value:
+                setattr(employee, column, rotated)
+                values += 1
+    return values, failed
+
+def convert_employee(employee):
+    """Move every legacy text value of an employee to the binary columns"""
+    from .models import EncryptedField, PII_FIELDS
+
+    values = failed = 0
+    for field in PII_FIELDS:
+        value = getattr(employee, f'encrypted_{field}')
+        if not value:
+            continue
+        try:
+            employee.write_pii(field, EncryptedField.decrypt_legacy(value))
+        except (InvalidToken, ValueError):
+            failed += 1
+            continue
+        values += 1
+    return values, failed
+
+def index_employee(employee):
+    """Recompute the blind indexes and name search tokens of an employee"""
+    from .models import Employee, BLIND_INDEX_FIELDS
+
+    values = 0
+    for field in BLIND_INDEX_FIELDS:
+        index = Employee.blind_index(employee.read_pii(field))
+        if getattr(employee, f'{field}_index') != index:
+            setattr(employee, f'{field}_index', index)
+            values += 1
+    if employee.update_search_tokens():
+        values += 1
+    return values, 0
+
+def rotate_range(start_id, end_id, batch_size):
+    return process_range(start_id, end_id, batch_size, rotate_employee)
+
+def convert_range(start_id, end_id, batch_size):
+    return process_range(start_id, end_id, batch_size, convert_employee)
+
+def index_range(start_id, end_id, batch_size):
+    return process_range(start_id, end_id, batch_size, index_employee)
@@ -0,0 +1,44 @@
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework import renderers
+
+class EchoBuffer:
+    """File-like object that hands back what is written, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+class CSVStreamRenderer(renderers.BaseRenderer):
+    """Render flat rows as CSV, one line at a time"""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Non-streamed responses such as errors
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(self.stream(rows))
+
+    def stream(self, rows):
+        writer = csv.writer(EchoBuffer())
+        header = None
+        for row in rows:
+            if header is None:
+                header = list(row)
+                yield writer.writerow(header)
+            yield writer.writerow([row.get(column, '') for column in header])
+
+class NDJSONStreamRenderer(renderers.BaseRenderer):
+    """Render rows as newline delimited JSON, one object per line"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(self.stream(rows))
+
+    def stream(self, rows):
+        for row in rows:
+            yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
@@ -0,0 +1,183 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date
+from django.db import models, transaction
+from django.db.models import Avg, Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from companies.models import Company
+from .models import DaysBetween, Employee, EmployeeAnalyticsRollup
+
+# Tenure sums are stored as days since this date
+ROLLUP_EPOCH = date(2000, 1, 1)
+
+_deferred = ContextVar('employee_rollups_deferred', default=False)
+
+def employee_contribution(employee_id):
+    """The rollup key and tenure start an employee counts towards, or None"""
+    if employee_id is None:
+        return None
+    row = Employee.objects.filter(pk=employee_id).values(
+        'company_id',
+        'is_active',
+        'current_position__department_id',
+        'current_position__employment_type',
+        'current_position__start_date',
+    ).first()
+    if row is None:
+        return None
+    return (
+        row['company_id'],
+        row['current_position__department_id'],
+        row['current_position__employment_type'] or '',
+        row['is_active'],
+        row['current_position__start_date'],
+    )
+
+def apply_contribution(contribution, sign):
+    """Add (sign=1) or remove (sign=-1) one employee from its rollup row"""
+    if contribution is None:
+        return
+    company_id, department_id, employment_type, is_active, start_date = contribution
+    counts_tenure = is_active and start_date is not None
+    changes = {
+        'headcount': F('headcount') + sign,
+        'active_count': F('active_count') + (sign if is_active else 0),
+        'tenure_count': F('tenure_count') + (sign if counts_tenure else 0),
+        'tenure_start_days': F('tenure_start_days') + (sign * (start_date - ROLLUP_EPOCH).days if counts_tenure else 0),
+    }
+    key = {'company_id': company_id, 'department_id': department_id, 'employment_type': employment_type}
+    if not EmployeeAnalyticsRollup.objects.filter(**key).update(**changes):
+        # A concurrent insert may leave two rows for a key; readers sum them
+        EmployeeAnalyticsRollup.objects.create(
+            **key,
+            headcount=sign,
+            active_count=sign if is_active else 0,
+            tenure_count=sign if counts_tenure else 0,
+            tenure_start_days=sign * (start_date - ROLLUP_EPOCH).days if counts_tenure else 0,
+        )
+
+@contextmanager
+def track_rollups(employee):
+    """
+    Move an employee between rollup rows if the wrapped write changes what
+    it counts towards. employee is an Employee or an employee id.
+    """
+    if _deferred.get():
+        yield
+        return
+    before = employee_contribution(employee.pk if isinstance(employee, Employee) else employee)
+    yield
+    after = employee_contribution(employee.pk if isinstance(employee, Employee) else employee)
+    if before != after:
+        with transaction.atomic():
+            apply_contribution(before, -1)
+            apply_contribution(after, 1)
+
+@contextmanager
+def defer_rollups():
+    """Skip incremental rollup updates; the caller rebuilds the affected companies"""
+    token = _deferred.set(True)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+
+def rebuild_rollups(company_ids=None):
+    """Recompute the rollup rows of the given companies (all when None) from scratch"""
+    employees = Employee.objects.all()
+    rollups = EmployeeAnalyticsRollup.objects.all()
+    companies = Company.objects.all()
+    if company_ids is not None:
+        employees = employees.filter(company_id__in=company_ids)
+        rollups = rollups.filter(company_id__in=company_ids)
+        companies = companies.filter(pk__in=company_ids)
+
+    tenure = Q(is_active=True, current_position__isnull=False)
+    rows = employees.order_by().values(
+        'company_id', 'current_position__department_id', 'current_position__employment_type'
+    ).annotate(
+        headcount=Count('pk'),
+        active_count=Count('pk', filter=Q(is_active=True)),
+        tenure_count=Count('pk', filter=tenure),
+        tenure_start_days=Coalesce(
+            Sum(
+                DaysBetween('current_position__start_date', Value(ROLLUP_EPOCH, output_field=models.DateField())),
+                filter=tenure,
+            ),
+            0,
+        ),
+    )
+
+    with transaction.atomic():
+        # Serialise rebuilds of the same companies
+        list(companies.select_for_update().values_list('pk', flat=True))
+        rollups.delete()
+        EmployeeAnalyticsRollup.objects.bulk_create([
+            EmployeeAnalyticsRollup(
+                company_id=row['company_id'],
+                department_id=row['current_position__department_id'],
+                employment_type=row['current_position__employment_type'] or '',
+                headcount=row['headcount'],
+                active_count=row['active_count'],
+                tenure_count=row['tenure_count'],
+                tenure_start_days=row['tenure_start_days'],
+            )
+            for row in rows
+        ])
+
+def company_analytics(rollups):
+    """Dashboard figures from a queryset of rollup rows"""
+    totals = rollups.aggregate(
+        total_employees=Coalesce(Sum('headcount'), 0),
+        active_employees=Coalesce(Sum('active_count'), 0),
+        tenure_count=Coalesce(Sum('tenure_count'), 0),
+        tenure_start_days=Coalesce(Sum('tenure_start_days'), 0),
+    )
+    analytics = {
+        'total_employees': totals['total_employees'],
+        'active_employees': totals['active_employees'],
+        'by_department': {},
+        'by_employment_type': {},
+        'average_tenure_days': 0,
+    }
+
+    placed = rollups.filter(department__isnull=False)
+    for row in placed.values('department__name').annotate(count=Sum('headcount')).order_by():
+        if row['count']:
+            analytics['by_department'][row['department__name']] = row['count']
+    for row in placed.values('employment_type').annotate(count=Sum('headcount')).order_by():
+        if row['count']:
+            analytics['by_employment_type'][row['employment_type'] or 'Unknown'] = row['count']
+
+    if totals['tenure_count']:
+        today = (date.today() - ROLLUP_EPOCH).days
+        analytics['average_tenure_days'] = round(today - totals['tenure_start_days'] / totals['tenure_count'], 1)
+    return analytics
+
+def analytics_as_of(positions, day):
+    """
+    Dashboard figures for a past day, from the positions held on it.
+
+    The rollups only describe today, so these come from an indexed scan of
+    the positions active on day. Employees are counted once per group, but
+    on the day one position ends and the next starts they appear in both
+    groups, and tenure is averaged over the positions.
+    """
+    positions = positions.active_on(day).order_by()
+    totals = positions.aggregate(
+        employees=Count('employee', distinct=True),
+        tenure=Avg(DaysBetween(Value(day, output_field=models.DateField()), 'start_date')),
+    )
+    analytics = {
+        'as_of': day.isoformat(),
+        'total_employees': totals['employees'],
+        'active_employees': totals['employees'],
+        'by_department': {},
+        'by_employment_type': {},
+        'average_tenure_days': round(totals['tenure'] or 0, 1),
+    }
+    for row in positions.values('department__name').annotate(count=Count('employee', distinct=True)):
+        analytics['by_department'][row['department__name']] = row['count']
+    for row in positions.values('employment_type').annotate(count=Count('employee', distinct=True)):
+        analytics['by_employment_type'][row['employment_type'] or 'Unknown'] = row['count']
+    return analytics
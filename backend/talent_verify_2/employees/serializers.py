@@ -1,6 +1,8 @@
 # backend/employees/serializers.py
+from django.db import models
+from django.db.models import Prefetch
 from rest_framework import serializers
-from .models import Employee, EmployeePosition, EmployeeDocument
+from .models import Employee, EmployeePosition, EmployeeDocument, PII_FIELDS, decrypt_employees
 from companies.serializers import DepartmentSerializer
 
 class EmployeePositionSerializer(serializers.ModelSerializer):
@@ -16,6 +18,13 @@ class EmployeePositionSerializer(serializers.ModelSerializer):
             'employment_type', 'manager', 'duration', 'created_at'
         ]
     
+    def validate(self, data):
+        start_date = data.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = data.get('end_date', getattr(self.instance, 'end_date', None))
+        if start_date and end_date and end_date < start_date:
+            raise serializers.ValidationError({'end_date': 'end_date must not be before start_date'})
+        return data
+    
     def get_duration(self, obj):
         if obj.end_date:
             duration = obj.end_date - obj.start_date
@@ -36,6 +45,58 @@ class EmployeeDocumentSerializer(serializers.ModelSerializer):
             'uploaded_by_name', 'is_verified', 'verified_by_name', 'verified_date'
         ]
 
+class PositionTransitionSerializer(serializers.Serializer):
+    """One promotion, transfer or termination in a bulk_transitions request"""
+    KIND_CHOICES = ['promotion', 'transfer', 'termination']
+    
+    employee = serializers.IntegerField()
+    kind = serializers.ChoiceField(choices=KIND_CHOICES)
+    effective_date = serializers.DateField()
+    role = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    department_name = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    employment_type = serializers.ChoiceField(
+        choices=EmployeePosition._meta.get_field('employment_type').choices, required=False
+    )
+    
+    def validate(self, data):
+        if data['kind'] == 'promotion' and not data.get('role'):
+            raise serializers.ValidationError({'role': 'A promotion needs the new role'})
+        if data['kind'] == 'transfer' and not data.get('department_name'):
+            raise serializers.ValidationError({'department_name': 'A transfer needs the new department'})
+        return data
+
+class BulkTransitionSerializer(serializers.Serializer):
+    transitions = PositionTransitionSerializer(many=True, allow_empty=False, max_length=5000)
+    
+    def validate_transitions(self, value):
+        employee_ids = [item['employee'] for item in value]
+        if len(set(employee_ids)) != len(employee_ids):
+            raise serializers.ValidationError('Each employee can only appear once per request')
+        return value
+
+def requested_fields(request):
+    """
+    Parse ?fields= and ?expand= into (fields or None, expand).
+
+    Only GET requests are narrowed so writes always see every field.
+    """
+    if request is None or request.method != 'GET':
+        return None, set()
+    
+    def parse(param):
+        return {name.strip() for name in request.query_params.get(param, '').split(',') if name.strip()}
+    
+    fields = parse('fields')
+    return (fields or None), parse('expand')
+
+class EmployeeListSerializer(serializers.ListSerializer):
+    """Decrypt the PII of the whole page in one batch before serializing it"""
+    
+    def to_representation(self, data):
+        employees = data.all() if isinstance(data, models.manager.BaseManager) else data
+        fields = [field for field in PII_FIELDS if field in self.child.fields]
+        return super().to_representation(decrypt_employees(employees, fields))
+
 class EmployeeSerializer(serializers.ModelSerializer):
     positions = EmployeePositionSerializer(many=True, read_only=True)
     documents = EmployeeDocumentSerializer(many=True, read_only=True)
@@ -57,6 +118,71 @@ class EmployeeSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at', 'date_joined']
+        list_serializer_class = EmployeeListSerializer
+    
+    # Nested relations; with ?fields= they are rendered as ids unless in ?expand=
+    NESTED_FIELDS = {
+        'positions': lambda: serializers.PrimaryKeyRelatedField(many=True, read_only=True),
+        'documents': lambda: serializers.PrimaryKeyRelatedField(many=True, read_only=True),
+        'current_position': lambda: serializers.PrimaryKeyRelatedField(read_only=True),
+    }
+    
+    # Employee columns each plain field reads
+    FIELD_COLUMNS = {
+        **{field: [f'encrypted_{field}', f'encrypted_{field}_bin'] for field in PII_FIELDS},
+        'is_active': ['is_active'],
+        'date_joined': ['date_joined'],
+        'created_at': ['created_at'],
+        'updated_at': ['updated_at'],
+        'current_position': ['current_position'],
+    }
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, expand = requested_fields(self.context.get('request'))
+        if fields is None:
+            return
+        
+        wanted = fields | expand
+        for name in list(self.fields):
+            if name != 'id' and name not in wanted:
+                self.fields.pop(name)
+            elif name in self.NESTED_FIELDS and name not in expand:
+                self.fields[name] = self.NESTED_FIELDS[name]()
+    
+    @classmethod
+    def prepare_queryset(cls, queryset, fields=None, expand=()):
+        """
+        Load only the columns and relations a (sparse) representation reads.
+        Without a fieldset this is EmployeeQuerySet.for_serializer().
+        """
+        if fields is None:
+            return queryset.for_serializer()
+        
+        wanted = set(fields) | set(expand)
+        columns = ['company', 'created_at']  # company for permission checks, created_at for ordering
+        for name in wanted:
+            columns.extend(cls.FIELD_COLUMNS.get(name, []))
+        queryset = queryset.select_related('company')
+        
+        if 'current_position' in expand:
+            queryset = queryset.select_related('current_position__department')
+            columns.extend(['current_position__department', *[
+                f'current_position__{field.name}' for field in EmployeePosition._meta.concrete_fields
+            ]])
+        if 'positions' in expand:
+            queryset = queryset.prefetch_related('positions__department')
+        elif 'positions' in wanted:
+            queryset = queryset.prefetch_related(
+                Prefetch('positions', queryset=EmployeePosition.objects.only('id', 'employee_id', 'start_date'))
+            )
+        if 'documents' in expand:
+            queryset = queryset.prefetch_related('documents__uploaded_by', 'documents__verified_by')
+        elif 'documents' in wanted:
+            queryset = queryset.prefetch_related(
+                Prefetch('documents', queryset=EmployeeDocument.objects.only('id', 'employee_id'))
+            )
+        return queryset.only(*columns)
 
     def create(self, validated_data):
         validated_data['created_by'] = self.context['request'].user
@@ -114,12 +240,6 @@ class EmployeeHistorySerializer(serializers.ModelSerializer):
         return obj.positions.count()
     
     def get_total_experience_days(self, obj):
-        total_days = 0
-        for position in obj.positions.all():
-            if position.end_date:
-                duration = position.end_date - position.start_date
-            else:
-                from datetime import date
-                duration = date.today() - position.start_date
-            total_days += duration.days
-        return total_days
\ No newline at end of file
+        if hasattr(obj, 'experience_days'):
+            return obj.experience_days
+        return Employee.objects.with_experience().values_list('experience_days', flat=True).get(pk=obj.pk)
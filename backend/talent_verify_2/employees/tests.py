@@ -1,3 +1,89 @@
+from datetime import date
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from authentication.models import UserRole
+from companies.models import Company, Department
+from users.models import User
+from .models import Employee, EmployeePosition
 
-# Create your tests here.
+class EmployeeFilterQueryPlanTests(TestCase):
+    """The position filters must not fall back to joins plus DISTINCT"""
+
+    FILTERS = {
+        'department': 'eng',
+        'role': 'dev',
+        'employment_type': 'full_time',
+        'year_started': 2021,
+        'year_left': 2022,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(
+            name='ACME',
+            registration_date=date(2020, 1, 1),
+            registration_number='R-1',
+            address='1 Main St',
+            contact_person='Jane',
+            email='hr@acme.test',
+        )
+        department = Department.objects.create(company=cls.company, name='Engineering')
+        cls.user = User.objects.create_user(username='admin', email='admin@acme.test', password='pw-123456!')
+        cls.user.profile.role = UserRole.objects.create(
+            name='company_admin', description='Company administrator', permissions={'employee_list': True}
+        )
+        cls.user.profile.company = cls.company
+        cls.user.profile.save()
+
+        cls.match = Employee(company=cls.company)
+        cls.match.name = 'Match'
+        cls.match.save()
+        EmployeePosition.objects.create(
+            employee=cls.match, department=department, role='junior dev',
+            start_date=date(2021, 1, 1), end_date=date(2022, 6, 1), is_current=False,
+        )
+        EmployeePosition.objects.create(
+            employee=cls.match, department=department, role='senior dev', start_date=date(2022, 6, 1),
+        )
+
+        other = Employee(company=cls.company)
+        other.name = 'Other'
+        other.save()
+        EmployeePosition.objects.create(
+            employee=other, department=department, role='designer', start_date=date(2021, 3, 1),
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def list_query(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/employees/', params)
+        self.assertEqual(response.status_code, 200)
+        selects = [query['sql'] for query in queries if 'FROM "employees_employee"' in query['sql']]
+        return response.json(), selects
+
+    def test_combined_filters_use_exists_without_distinct(self):
+        data, selects = self.list_query(self.FILTERS)
+
+        self.assertEqual([employee['id'] for employee in data['results']], [self.match.pk])
+        self.assertEqual(data['count'], 1)
+        for sql in selects:
+            self.assertNotIn('DISTINCT', sql.upper())
+        self.assertTrue(any(sql.upper().count('EXISTS') == len(self.FILTERS) for sql in selects))
+
+    def test_filtered_list_plan_has_no_distinct_step(self):
+        from .views import EmployeeFilter
+
+        queryset = EmployeeFilter(
+            data={key: str(value) for key, value in self.FILTERS.items()},
+            queryset=Employee.objects.filter(company=self.company),
+        ).qs
+        plan = queryset.explain()
+
+        self.assertNotIn('DISTINCT', plan.upper())
+        self.assertNotIn('Unique', plan)
+        self.assertEqual(list(queryset), [self.match])
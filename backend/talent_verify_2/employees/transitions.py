@@ -0,0 +1,161 @@
+from collections import defaultdict
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Upper
+from rest_framework.exceptions import ValidationError
+from companies.models import Department
+from companies.versions import bump_company_versions
+from audit.models import AuditLog
+from .models import Employee, EmployeePosition
+from .rollups import defer_rollups, rebuild_rollups
+
+def apply_transitions(transitions, employees, user=None):
+    """
+    Apply a batch of promotions, transfers and terminations set-wise.
+
+    transitions are validated PositionTransitionSerializer items and employees
+    is the queryset they may touch. Current positions are closed with one
+    UPDATE per effective date, new positions are bulk-inserted and the
+    employee pointers, experience totals and rollups are refreshed once for
+    the whole batch, all in one transaction. Nothing is applied if any
+    transition is invalid.
+    """
+    employee_ids = [item['employee'] for item in transitions]
+    current = {
+        row['pk']: row
+        for row in employees.filter(pk__in=employee_ids).values(
+            'pk',
+            'company_id',
+            'current_position_id',
+            'current_position__role',
+            'current_position__department_id',
+            'current_position__employment_type',
+            'current_position__start_date',
+        )
+    }
+
+    errors = {}
+    for index, item in enumerate(transitions):
+        row = current.get(item['employee'])
+        if row is None:
+            errors[index] = ['Employee not found']
+        elif row['current_position__start_date'] and item['effective_date'] < row['current_position__start_date']:
+            errors[index] = ['effective_date is before the start of the current position']
+        elif item['kind'] != 'termination' and row['current_position_id'] is None and not (
+            item.get('role') and item.get('department_name')
+        ):
+            errors[index] = ['role and department_name are required for employees without a current position']
+    if errors:
+        raise ValidationError({'transitions': errors})
+
+    with transaction.atomic(), defer_rollups():
+        departments = resolve_departments(transitions, current)
+
+        # Close the open positions, one statement per effective date
+        closing = defaultdict(list)
+        for item in transitions:
+            closing[item['effective_date']].append(item['employee'])
+        for effective_date, ids in closing.items():
+            EmployeePosition.objects.filter(employee_id__in=ids, is_current=True).update(
+                is_current=False, end_date=effective_date
+            )
+
+        opened = EmployeePosition.objects.bulk_create([
+            EmployeePosition(
+                employee_id=item['employee'],
+                department_id=departments.get(
+                    (current[item['employee']]['company_id'], item.get('department_name')),
+                    current[item['employee']]['current_position__department_id'],
+                ),
+                role=item.get('role') or current[item['employee']]['current_position__role'],
+                employment_type=(
+                    item.get('employment_type')
+                    or current[item['employee']]['current_position__employment_type']
+                    or 'full_time'
+                ),
+                start_date=item['effective_date'],
+                is_current=True,
+                created_by=user,
+            )
+            for item in transitions
+            if item['kind'] != 'termination'
+        ])
+
+        terminated = [item['employee'] for item in transitions if item['kind'] == 'termination']
+        if terminated:
+            Employee.objects.filter(pk__in=terminated).update(is_active=False)
+
+        touched = Employee.objects.filter(pk__in=employee_ids)
+        touched.update(current_position=Subquery(
+            EmployeePosition.objects.filter(employee=OuterRef('pk'), is_current=True)
+            .order_by('-start_date', '-pk').values('pk')[:1]
+        ))
+        touched.refresh_experience()
+        company_ids = sorted({row['company_id'] for row in current.values()})
+        rebuild_rollups(company_ids)
+        bump_company_versions(company_ids)
+
+        log_transitions(transitions, current, opened, user)
+
+    return {
+        'transitioned': len(transitions),
+        'positions_created': len(opened),
+        'terminated': len(terminated),
+    }
+
+def resolve_departments(transitions, current):
+    """
+    Map (company id, department name) to ids, creating missing departments in one INSERT.
+
+    Names match case-insensitively, like bulk import, so "engineering" finds
+    an existing "Engineering" instead of adding a second department.
+    """
+    wanted = {
+        (current[item['employee']]['company_id'], item['department_name'])
+        for item in transitions
+        if item.get('department_name') and item['kind'] != 'termination'
+    }
+    if not wanted:
+        return {}
+
+    company_ids = {company_id for company_id, _ in wanted}
+    names = {name.upper() for _, name in wanted}
+    existing = {}
+    for pk, company_id, upper_name in Department.objects.annotate(upper_name=Upper('name')).filter(
+        company_id__in=company_ids, upper_name__in=names
+    ).order_by('pk').values_list('pk', 'company_id', 'upper_name'):
+        existing.setdefault((company_id, upper_name), pk)
+
+    # One new department per company and name, whatever the spellings requested
+    missing = {}
+    for company_id, name in sorted(wanted):
+        if (company_id, name.upper()) not in existing:
+            missing.setdefault((company_id, name.upper()), name)
+    for department in Department.objects.bulk_create([
+        Department(company_id=company_id, name=name) for (company_id, _), name in missing.items()
+    ]):
+        existing[(department.company_id, department.name.upper())] = department.pk
+
+    return {(company_id, name): existing[(company_id, name.upper())] for company_id, name in wanted}
+
+def log_transitions(transitions, current, opened, user):
+    """One small audit row per employee, written with a single INSERT"""
+    content_type = ContentType.objects.get_for_model(Employee)
+    new_positions = {position.employee_id: position for position in opened}
+    rows = []
+    for item in transitions:
+        position = new_positions.get(item['employee'])
+        rows.append(AuditLog(
+            content_type=content_type,
+            object_id=item['employee'],
+            action='UPDATE',
+            table_name=EmployeePosition._meta.db_table,
+            record_id=str(position.pk) if position else None,
+            description=f"Bulk {item['kind']} effective {item['effective_date'].isoformat()}",
+            old_values={'position': current[item['employee']]['current_position_id']},
+            new_values={'position': position.pk, 'role': position.role} if position else {'position': None},
+            changed_fields=['current_position'],
+            user=user,
+        ))
+    AuditLog.objects.bulk_create(rows)
@@ -1,21 +1,44 @@
 # backend/employees/views.py
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from django.db.models import Q, Count, Avg
+from rest_framework.settings import api_settings
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connections, transaction
+from django.db.models import Q, Exists, F, Max, OuterRef, Subquery
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import rest_framework as django_filters
 from datetime import datetime, date
-from .models import Employee, EmployeePosition
-from .serializers import EmployeeSerializer, EmployeeHistorySerializer, EmployeePositionSerializer
+from itertools import islice
+import os
+from .models import (
+    Employee, EmployeePosition, EmployeeSearchToken, EmployeeAnalyticsRollup, POSITION_SEARCH_CONFIG, decrypt_employees
+)
+from .encryption import decryption_cache_stats
+from .rollups import analytics_as_of, company_analytics, rebuild_rollups
+from .orgchart import org_chart
+from .renderers import CSVStreamRenderer, NDJSONStreamRenderer
+from talent_verify_2.pagination import HybridCursorPagination
+from .serializers import (
+    EmployeeSerializer, EmployeeHistorySerializer, EmployeePositionSerializer, BulkTransitionSerializer, requested_fields
+)
+from .transitions import apply_transitions
 from authentication.permissions import RoleBasedPermission, CompanyDataPermission
-from companies.models import Department
+from companies.models import Company, Department
 
 class EmployeeFilter(django_filters.FilterSet):
     """Advanced filtering for employees"""
     
+    q = django_filters.CharFilter(method='filter_search', label='Role and duties search')
     name = django_filters.CharFilter(method='filter_name', label='Name')
-    company = django_filters.CharFilter(field_name='company__name', lookup_expr='icontains')
+    name_exact = django_filters.CharFilter(method='filter_blind_index', label='Exact name')
+    email = django_filters.CharFilter(method='filter_blind_index', label='Email')
+    employee_id = django_filters.CharFilter(method='filter_blind_index', label='Employee ID')
+    company = django_filters.CharFilter(method='filter_company')
     department = django_filters.CharFilter(method='filter_department')
     role = django_filters.CharFilter(method='filter_role')
     employment_type = django_filters.CharFilter(method='filter_employment_type')
@@ -23,48 +46,82 @@ class EmployeeFilter(django_filters.FilterSet):
     year_left = django_filters.NumberFilter(method='filter_year_left')
     is_current = django_filters.BooleanFilter(method='filter_is_current')
     experience_years = django_filters.NumberFilter(method='filter_experience_years')
+    as_of = django_filters.DateFilter(method='filter_as_of', label='Employed on')
     
     class Meta:
         model = Employee
         fields = [
-            'name', 'company', 'department', 'role', 'employment_type',
-            'year_started', 'year_left', 'is_current', 'experience_years'
+            'q', 'name', 'name_exact', 'email', 'employee_id', 'company', 'department', 'role', 'employment_type',
+            'year_started', 'year_left', 'is_current', 'experience_years', 'as_of'
         ]
     
     def filter_name(self, queryset, name, value):
-        # Since names are encrypted, we need to decrypt and search
-        # This is not efficient for large datasets - consider using searchable hash
-        matching_ids = []
-        for employee in queryset:
-            if value.lower() in employee.name.lower():
-                matching_ids.append(employee.id)
-        return queryset.filter(id__in=matching_ids)
+        # Names are encrypted, so match the blind-indexed word prefixes
+        # stored in EmployeeSearchToken instead of decrypting every row
+        matches = EmployeeSearchToken.matching(value, company=self.scoped_company())
+        return queryset.filter(pk__in=matches.values('employee_id')).annotate(
+            name_rank=Subquery(matches.filter(employee_id=OuterRef('pk')).values('rank')[:1])
+        )
+    
+    def filter_search(self, queryset, name, value):
+        # Full-text search over position roles and duties through the GIN
+        # indexed search_vector; other databases fall back to matching words
+        if connections[queryset.db].vendor != 'postgresql':
+            matches = EmployeePosition.objects.all()
+            for word in value.split():
+                matches = matches.filter(Q(role__icontains=word) | Q(duties__icontains=word))
+            return queryset.filter(pk__in=matches.values('employee_id'))
+        
+        query = SearchQuery(value, search_type='websearch', config=POSITION_SEARCH_CONFIG)
+        matches = EmployeePosition.objects.filter(search_vector=query)
+        ranks = matches.filter(employee=OuterRef('pk')).values('employee').annotate(
+            rank=Max(SearchRank(F('search_vector'), query))
+        ).values('rank')
+        return queryset.filter(pk__in=matches.values('employee_id')).annotate(search_rank=Subquery(ranks))
+    
+    def scoped_company(self):
+        profile = self.request.user.profile
+        if profile.role and profile.role.name != 'talent_verify_admin':
+            return profile.company
+        return None
+    
+    def filter_blind_index(self, queryset, name, value):
+        # Exact matches on the normalized value use the indexed keyed hash,
+        # nothing is decrypted
+        field = 'name' if name == 'name_exact' else name
+        return queryset.filter(**{f'{field}_index': Employee.blind_index(value)})
+    
+    # Position filters are correlated EXISTS subqueries: combined they plan as
+    # semi-joins, with no row multiplication and no DISTINCT before paging.
+    # The name filters stay on icontains, which PostgreSQL serves from the
+    # UPPER() trigram indexes.
+    
+    def has_position(self, queryset, **lookups):
+        return queryset.filter(Exists(EmployeePosition.objects.filter(employee=OuterRef('pk'), **lookups)))
+    
+    def filter_company(self, queryset, name, value):
+        queryset = queryset.filter(company__in=Company.objects.filter(name__icontains=value))
+        if connections[queryset.db].vendor == 'postgresql':
+            queryset = queryset.annotate(company_rank=TrigramSimilarity('company__name', value))
+        return queryset
     
     def filter_department(self, queryset, name, value):
-        return queryset.filter(
-            positions__department__name__icontains=value
-        ).distinct()
+        return self.has_position(queryset, department__name__icontains=value)
     
     def filter_role(self, queryset, name, value):
-        return queryset.filter(
-            positions__role__icontains=value
-        ).distinct()
+        return self.has_position(queryset, role__icontains=value)
     
     def filter_employment_type(self, queryset, name, value):
-        return queryset.filter(
-            positions__employment_type=value,
-            positions__is_current=True
-        ).distinct()
+        return self.has_position(queryset, employment_type=value, is_current=True)
     
     def filter_year_started(self, queryset, name, value):
-        return queryset.filter(
-            positions__start_date__year=value
-        ).distinct()
+        return self.has_position(queryset, start_date__year=value)
     
     def filter_year_left(self, queryset, name, value):
-        return queryset.filter(
-            positions__end_date__year=value
-        ).distinct()
+        return self.has_position(queryset, end_date__year=value)
+    
+    def filter_as_of(self, queryset, name, value):
+        return queryset.filter(Exists(EmployeePosition.objects.filter(employee=OuterRef('pk')).active_on(value)))
     
     def filter_is_current(self, queryset, name, value):
         if value:
@@ -75,35 +132,37 @@ class EmployeeFilter(django_filters.FilterSet):
     def filter_experience_years(self, queryset, name, value):
         # Filter employees with at least X years of experience
         target_days = value * 365
-        matching_ids = []
-        
-        for employee in queryset:
-            total_experience = 0
-            for position in employee.positions.all():
-                if position.end_date:
-                    duration = position.end_date - position.start_date
-                else:
-                    duration = date.today() - position.start_date
-                total_experience += duration.days
-            
-            if total_experience >= target_days:
-                matching_ids.append(employee.id)
-        
-        return queryset.filter(id__in=matching_ids)
+        return queryset.experience_at_least(target_days)
+
+class RankedOrderingFilter(filters.OrderingFilter):
+    """Order name, full-text and company search results by rank unless an ordering is requested"""
+    
+    rank_annotations = ['name_rank', 'search_rank', 'company_rank']
+    
+    def filter_queryset(self, request, queryset, view):
+        ranks = [f'-{rank}' for rank in self.rank_annotations if rank in queryset.query.annotations]
+        if ranks and not request.query_params.get(self.ordering_param):
+            return queryset.order_by(*ranks, *self.get_default_ordering(view))
+        return super().filter_queryset(request, queryset, view)
 
 class EmployeeViewSet(viewsets.ModelViewSet):
     serializer_class = EmployeeSerializer
     permission_classes = [CompanyDataPermission]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, RankedOrderingFilter]
     filterset_class = EmployeeFilter
     search_fields = ['company__name']  # Limited due to encryption
     ordering_fields = ['created_at', 'date_joined', 'company__name']
     ordering = ['-created_at']
+    pagination_class = HybridCursorPagination
+    cursor_ordering = ('-created_at', 'id')
 
     def get_queryset(self):
-        queryset = Employee.objects.select_related('company').prefetch_related(
-            'positions__department', 'documents'
-        )
+        if self.action in ('list', 'retrieve'):
+            queryset = EmployeeSerializer.prepare_queryset(Employee.objects.all(), *requested_fields(self.request))
+        elif self.action == 'org_chart':
+            queryset = Employee.objects.select_related('company', 'current_position')
+        else:
+            queryset = Employee.objects.for_serializer()
         
         # Filter by user's company if not admin
         user_profile = self.request.user.profile
@@ -111,6 +170,9 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             if user_profile.company:
                 queryset = queryset.filter(company=user_profile.company)
         
+        if self.action == 'history':
+            queryset = queryset.with_experience()
+        
         return queryset
     
     @action(detail=True, methods=['get'])
@@ -120,74 +182,131 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         serializer = EmployeeHistorySerializer(employee)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def org_chart(self, request, pk=None):
+        """
+        Reporting tree under the employee's current position; ?depth= limits
+        how many levels of reports are included.
+        """
+        employee = self.get_object()
+        if employee.current_position is None:
+            return Response({"error": "Employee has no current position"}, status=status.HTTP_404_NOT_FOUND)
+        
+        depth = request.query_params.get('depth')
+        if depth is not None and (not depth.isdigit() or int(depth) < 1):
+            return Response({"error": "depth must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(org_chart(employee.current_position, employee.company_id, int(depth) if depth else None))
+    
     @action(detail=True, methods=['post'])
     def add_position(self, request, pk=None):
         """Add a new position to an employee"""
         employee = self.get_object()
         
-        # End current position if exists
-        current_position = employee.positions.filter(is_current=True).first()
-        if current_position:
-            current_position.is_current = False
-            current_position.end_date = request.data.get('start_date', date.today())
-            current_position.save()
-        
-        # Create new position
         department_name = request.data.get('department_name')
         if not department_name:
             return Response({"error": "department_name is required"}, status=status.HTTP_400_BAD_REQUEST)
-        department, _ = Department.objects.get_or_create(company=employee.company, name=department_name)
-        position_data = request.data.copy()
-        position_data['employee'] = employee.id
-        position_data['is_current'] = True
-        position_data['department_id'] = department.id
-        
-        serializer = EmployeePositionSerializer(data=position_data)
-        if serializer.is_valid():
+        
+        with transaction.atomic():
+            department, _ = Department.objects.get_or_create(company=employee.company, name=department_name)
+            position_data = request.data.copy()
+            position_data['employee'] = employee.id
+            position_data['is_current'] = True
+            position_data['department_id'] = department.id
+            
+            serializer = EmployeePositionSerializer(data=position_data)
+            serializer.is_valid(raise_exception=True)
+            start_date = serializer.validated_data['start_date']
+            
+            # End current position if exists; it cannot end before it started
+            current_position = employee.current_position
+            if current_position:
+                if start_date < current_position.start_date:
+                    raise ValidationError({'start_date': 'start_date must not be before the start of the current position'})
+                current_position.is_current = False
+                current_position.end_date = start_date
+                current_position.save()
+            
             serializer.save(created_by=request.user, employee=employee)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
     
-    @action(detail=False, methods=['get'])
-    def analytics(self, request):
-        """Get employee analytics"""
-        queryset = self.get_queryset()
-        
-        analytics = {
-            'total_employees': queryset.count(),
-            'active_employees': queryset.filter(is_active=True).count(),
-            'by_department': {},
-            'by_employment_type': {},
-            'average_tenure_days': 0,
-        }
+    @action(detail=False, methods=['post'])
+    def bulk_transitions(self, request):
+        """
+        Promote, transfer or terminate many employees in one request.
+
+        Each transition names the employee, its kind and effective date, plus
+        the new role and/or department_name. The batch is applied atomically.
+        """
+        user_profile = request.user.profile
+        if not request.user.is_superuser and not user_profile.permissions.get('employee_update', False):
+            return Response(
+                {'error': 'You do not have permission to update employees'},
+                status=status.HTTP_403_FORBIDDEN
+            )
         
-        # Department breakdown
-        dept_stats = queryset.values(
-            'positions__department__name'
-        ).annotate(
-            count=Count('id', distinct=True)
-        ).filter(positions__is_current=True)
+        serializer = BulkTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        for stat in dept_stats:
-            dept_name = stat['positions__department__name'] or 'Unknown'
-            analytics['by_department'][dept_name] = stat['count']
+        employees = Employee.objects.all()
+        if user_profile.role and user_profile.role.name != 'talent_verify_admin' and user_profile.company:
+            employees = employees.filter(company=user_profile.company)
         
-        # Employment type breakdown
-        emp_type_stats = queryset.values(
-            'positions__employment_type'
-        ).annotate(
-            count=Count('id', distinct=True)
-        ).filter(positions__is_current=True)
+        result = apply_transitions(serializer.validated_data['transitions'], employees, user=request.user)
+        return Response(result, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        """
+        Get employee analytics from the per-company rollups, or with
+        ?as_of=YYYY-MM-DD for the positions held on that day.
+        """
+        rollups = EmployeeAnalyticsRollup.objects.all()
+        employees = Employee.objects.all()
+        positions = EmployeePosition.objects.all()
+        user_profile = request.user.profile
+        if user_profile.role and user_profile.role.name != 'talent_verify_admin' and user_profile.company:
+            rollups = rollups.filter(company=user_profile.company)
+            employees = employees.filter(company=user_profile.company)
+            positions = positions.filter(employee__company=user_profile.company)
+        
+        if 'as_of' in request.query_params:
+            as_of = parse_date(request.query_params['as_of'])
+            if as_of is None:
+                return Response({'error': 'as_of must be a date (YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(analytics_as_of(positions, as_of))
         
-        for stat in emp_type_stats:
-            emp_type = stat['positions__employment_type'] or 'Unknown'
-            analytics['by_employment_type'][emp_type] = stat['count']
+        # Build the rollups on first use, e.g. right after they were introduced
+        if not rollups.exists() and employees.exists():
+            rebuild_rollups(list(employees.order_by().values_list('company_id', flat=True).distinct()))
         
-        return Response(analytics)
+        return Response(company_analytics(rollups))
     
     @action(detail=False, methods=['get'])
+    def decryption_cache(self, request):
+        """Hit and miss counters of the PII decryption cache in the process serving the request"""
+        user_profile = request.user.profile
+        if not request.user.is_superuser and not (user_profile.role and user_profile.role.name == 'talent_verify_admin'):
+            return Response(
+                {'error': 'You do not have permission to view cache statistics'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        stats = decryption_cache_stats()
+        return Response({'enabled': stats is not None, 'pid': os.getpid(), **(stats or {})})
+    
+    @action(
+        detail=False,
+        methods=['get'],
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, CSVStreamRenderer, NDJSONStreamRenderer],
+    )
     def export(self, request):
-        """Export employee data (for authorized users only)"""
+        """
+        Export employee data (for authorized users only).
+
+        ?format=csv and ?format=ndjson (or the matching Accept header) stream
+        the rows; the default JSON response is built in memory.
+        """
         # Check export permission
         # user_profile = request.user.profile
         # if not user_profile.permissions.get('export_data', False):
@@ -198,25 +317,51 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         
         queryset = self.filter_queryset(self.get_queryset())
         
+        renderer = request.accepted_renderer
+        if isinstance(renderer, (CSVStreamRenderer, NDJSONStreamRenderer)):
+            response = StreamingHttpResponse(
+                renderer.stream(self.stream_export_rows(queryset)),
+                content_type=f'{renderer.media_type}; charset={renderer.charset}',
+            )
+            response['Content-Disposition'] = (
+                f'attachment; filename="employees_export_{date.today().isoformat()}.{renderer.format}"'
+            )
+            return response
+        
         # Prepare export data
-        export_data = []
-        for employee in queryset:
-            current_pos = employee.current_position
-            export_data.append({
-                'name': employee.name,
-                'employee_id': employee.employee_id,
-                'email': employee.email,
-                'phone': employee.phone,
-                'company': employee.company.name,
-                'current_role': current_pos.role if current_pos else '',
-                'current_department': current_pos.department.name if current_pos else '',
-                'start_date': current_pos.start_date if current_pos else '',
-                'employment_type': current_pos.employment_type if current_pos else '',
-                'is_active': employee.is_active,
-            })
+        export_data = [self.export_row(employee) for employee in queryset]
         
         return Response({
             'data': export_data,
             'total_records': len(export_data),
             'exported_at': datetime.now().isoformat(),
-        })
\ No newline at end of file
+        })
+    
+    def stream_export_rows(self, queryset):
+        """
+        Yield export rows from a server-side cursor in EXPORT_CHUNK_SIZE chunks,
+        decrypting one chunk at a time so memory stays flat.
+        """
+        chunk_size = settings.EXPORT_CHUNK_SIZE
+        employees = queryset.prefetch_related(None).iterator(chunk_size=chunk_size)
+        while True:
+            chunk = list(islice(employees, chunk_size))
+            if not chunk:
+                return
+            for employee in decrypt_employees(chunk):
+                yield self.export_row(employee)
+    
+    def export_row(self, employee):
+        current_pos = employee.current_position
+        return {
+            'name': employee.name,
+            'employee_id': employee.employee_id,
+            'email': employee.email,
+            'phone': employee.phone,
+            'company': employee.company.name,
+            'current_role': current_pos.role if current_pos else '',
+            'current_department': current_pos.department.name if current_pos else '',
+            'start_date': current_pos.start_date if current_pos else '',
+            'employment_type': current_pos.employment_type if current_pos else '',
+            'is_active': employee.is_active,
+        }
@@ -0,0 +1,33 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+class HybridCursorPagination(CursorPagination):
+    """
+    Keyset pagination when the request carries a cursor parameter, page
+    numbers otherwise.
+
+    Cursor mode pages on the view's cursor_ordering with an opaque cursor, so
+    any page costs the same index range scan and there is no COUNT(*). Send
+    an empty ?cursor= to get the first page. Requests without it keep the
+    page/count responses of the global PageNumberPagination.
+    """
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+
+    def __init__(self):
+        self.page_number_pagination = PageNumberPagination()
+        self.cursor_mode = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return self.page_number_pagination.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return self.page_number_pagination.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_ordering(self, request, queryset, view):
+        # The keyset must match the composite index, so ?ordering is ignored here
+        return view.cursor_ordering
@@ -12,12 +12,32 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
-from decouple import config
+from decouple import config, Csv
 from datetime import timedelta
 from cryptography.fernet import Fernet
 
 # Encryption key for PII data
 ENCRYPTION_KEY = config('ENCRYPTION_KEY', default=Fernet.generate_key().decode())
+# Ordered, comma separated Fernet keys for rotation: the first key encrypts,
+# all of them decrypt. Defaults to ENCRYPTION_KEY alone.
+ENCRYPTION_KEYS = config('ENCRYPTION_KEYS', default=ENCRYPTION_KEY, cast=Csv())
+# Cipher for the binary PII columns: 'aes-gcm' or 'fernet'
+PII_CIPHER = config('PII_CIPHER', default='aes-gcm')
+# Secret for the blind indexes used to search encrypted PII. Unlike the
+# encryption keys it cannot be rotated without running backfill_blind_indexes.
+# When unset the index key is derived (HKDF) from the primary encryption key,
+# so set it explicitly before rotating ENCRYPTION_KEYS.
+BLIND_INDEX_KEY = config('BLIND_INDEX_KEY', default=None)
+# Shortest name prefix that can be searched for; changing it also needs a backfill
+SEARCH_TOKEN_MIN_LENGTH = config('SEARCH_TOKEN_MIN_LENGTH', default=2, cast=int)
+# In-process LRU of decrypted PII values; 0 disables it. Entries expire after
+# the TTL and the cache is cleared whenever the keys change.
+PII_DECRYPT_CACHE_SIZE = config('PII_DECRYPT_CACHE_SIZE', default=0, cast=int)
+PII_DECRYPT_CACHE_TTL = config('PII_DECRYPT_CACHE_TTL', default=300, cast=int)
+# Batch decryption of listed employees is spread over this many threads once
+# a batch holds at least PII_DECRYPT_PARALLEL_MIN values
+PII_DECRYPT_THREADS = config('PII_DECRYPT_THREADS', default=4, cast=int)
+PII_DECRYPT_PARALLEL_MIN = config('PII_DECRYPT_PARALLEL_MIN', default=2000, cast=int)
 FRONTEND_URL = config('FRONTEND_URL','http://localhost:3000')
 
 AUTH_USER_MODEL = 'users.User'
@@ -50,6 +70,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions', 
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
@@ -61,7 +82,8 @@ INSTALLED_APPS = [
     'authentication',
     'bulk_operations',
     'audit',
-    'users'
+    'users',
+    'verification',
 ]
 
 MIDDLEWARE = [
@@ -176,7 +198,8 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
-        'user': '1000/hour'
+        'user': '1000/hour',
+        'verification': config('VERIFICATION_RATE', default='100000/hour'),
     }
 }
 
@@ -254,6 +277,42 @@ X_FRAME_OPTIONS = 'DENY'
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 
+# Bulk upload settings
+# Re-uploads of the same file (same SHA-256, company and operation type) inside
+# this window return the existing job instead of importing the rows again.
+BULK_UPLOAD_IDEMPOTENCY_WINDOW = timedelta(seconds=config('BULK_UPLOAD_IDEMPOTENCY_WINDOW', default=24 * 60 * 60, cast=int))
+# Rows read per chunk; also the interval at which job progress is saved
+BULK_UPLOAD_CHUNK_SIZE = config('BULK_UPLOAD_CHUNK_SIZE', default=1000, cast=int)
+# CSV files at least this large are split on row boundaries and processed by
+# BULK_UPLOAD_SHARD_WORKERS processes, each with its own DB connection
+BULK_UPLOAD_SHARD_WORKERS = config('BULK_UPLOAD_SHARD_WORKERS', default=min(os.cpu_count() or 1, 4), cast=int)
+BULK_UPLOAD_SHARD_MIN_BYTES = config('BULK_UPLOAD_SHARD_MIN_BYTES', default=20 * 1024 * 1024, cast=int)
+BULK_UPLOAD_SHARD_START_METHOD = config('BULK_UPLOAD_SHARD_START_METHOD', default='spawn')
+# Rows deleted per statement when a bulk import is rolled back
+BULK_ROLLBACK_BATCH_SIZE = config('BULK_ROLLBACK_BATCH_SIZE', default=5000, cast=int)
+
+# Seconds a verification answer is cached. Answers are also invalidated by
+# any write to the company's employees or positions (companies/versions.py);
+# with several processes that needs a shared cache such as Redis.
+VERIFICATION_CACHE_TTL = config('VERIFICATION_CACHE_TTL', default=300, cast=int)
+# Batch verification: batches up to the sync limit are answered in the
+# response, larger ones in the background, VERIFICATION_BATCH_CHUNK_SIZE
+# queries (two SQL queries) at a time
+VERIFICATION_BATCH_MAX_SIZE = config('VERIFICATION_BATCH_MAX_SIZE', default=10000, cast=int)
+VERIFICATION_BATCH_SYNC_LIMIT = config('VERIFICATION_BATCH_SYNC_LIMIT', default=500, cast=int)
+VERIFICATION_BATCH_CHUNK_SIZE = config('VERIFICATION_BATCH_CHUNK_SIZE', default=1000, cast=int)
+# A pending or processing batch that has saved no progress for this long is
+# assumed to have lost its worker and can be resumed
+VERIFICATION_BATCH_STALE_AFTER = timedelta(seconds=config('VERIFICATION_BATCH_STALE_AFTER', default=600, cast=int))
+
+# Org charts: deepest reporting level returned, and seconds a computed tree
+# is cached (writes to the company invalidate it sooner)
+ORG_CHART_MAX_DEPTH = config('ORG_CHART_MAX_DEPTH', default=50, cast=int)
+ORG_CHART_CACHE_TTL = config('ORG_CHART_CACHE_TTL', default=3600, cast=int)
+
+# Employees fetched and decrypted per chunk by streamed CSV/NDJSON exports
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
 # CORS settings for development
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -7,6 +7,7 @@ from companies.views import CompanyViewSet
 from employees.views import EmployeeViewSet
 from bulk_operations.views import BulkUploadViewSet
 from audit.views import AuditLogViewSet, SecurityEventViewSet
+from verification.views import VerificationViewSet, VerificationBatchViewSet
 from rest_framework_simplejwt.views import TokenRefreshView
 
 router = DefaultRouter()
@@ -16,6 +17,8 @@ router.register(r'bulk-upload', BulkUploadViewSet, basename='bulk-upload')
 router.register(r'audit-logs', AuditLogViewSet, basename='auditlog')
 router.register(r'security-events', SecurityEventViewSet, basename='securityevent')
 router.register(r'users', UserManagementViewSet, basename='users')
+router.register(r'verifications', VerificationViewSet, basename='verifications')
+router.register(r'verification-batches', VerificationBatchViewSet, basename='verification-batches')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -0,0 +1,16 @@
+from django.contrib import admin
+from .models import VerificationBatch
+
+@admin.register(VerificationBatch)
+class VerificationBatchAdmin(admin.ModelAdmin):
+    list_display = ['id', 'status', 'processed_queries', 'total_queries', 'created_by', 'created_at', 'completed_at']
+    list_filter = ['status']
+    # The queries and answers hold PII; they are read through the API only
+    exclude = ['queries', 'results']
+    readonly_fields = [
+        'status', 'total_queries', 'processed_queries', 'error_details',
+        'created_by', 'created_at', 'started_at', 'completed_at',
+    ]
+
+    def has_add_permission(self, request):
+        return False
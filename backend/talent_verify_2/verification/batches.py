@@ -0,0 +1,91 @@
+import logging
+import threading
+from datetime import date
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from .matching import hash_query, verify_hashed
+from .models import VerificationBatch
+
+logger = logging.getLogger(__name__)
+
+def stored_query(query):
+    """
+    A validated query in the JSON form kept on VerificationBatch: blind
+    indexes instead of the name, employee_id and email, dates as ISO strings
+    """
+    hashed = hash_query(query)
+    return {**hashed, 'start_date': hashed['start_date'].isoformat(), 'end_date': hashed['end_date'].isoformat()}
+
+def loaded_query(stored):
+    return {
+        **stored,
+        'start_date': date.fromisoformat(stored['start_date']),
+        'end_date': date.fromisoformat(stored['end_date']),
+    }
+
+def start_batch(queries, user):
+    """Save a batch and answer it in a background thread once the transaction commits"""
+    batch = VerificationBatch.objects.create(
+        queries=[stored_query(query) for query in queries],
+        total_queries=len(queries),
+        created_by=user,
+    )
+    run_in_background(batch.pk)
+    return batch
+
+def run_in_background(batch_id):
+    # In production, use a task queue instead: process_batch.delay(batch_id)
+    transaction.on_commit(lambda: threading.Thread(target=process_batch, args=(batch_id,), daemon=True).start())
+
+def stale_batches():
+    """Unfinished batches whose worker has not saved progress for VERIFICATION_BATCH_STALE_AFTER"""
+    cutoff = timezone.now() - settings.VERIFICATION_BATCH_STALE_AFTER
+    return VerificationBatch.objects.filter(status__in=['pending', 'processing'], heartbeat_at__lt=cutoff)
+
+def claim_stale_batch(batch_id):
+    """
+    Take over a stale batch; returns False when it is not stale. The
+    conditional update keeps two callers from both resuming it.
+    """
+    return bool(stale_batches().filter(pk=batch_id).update(heartbeat_at=timezone.now()))
+
+def resume_batch(batch_id):
+    """Restart a stale batch from its last saved chunk in a background thread"""
+    if not claim_stale_batch(batch_id):
+        return False
+    run_in_background(batch_id)
+    return True
+
+def process_batch(batch_id):
+    """
+    Answer a batch chunk by chunk, saving the answers after each chunk so a
+    resumed batch continues where the last run stopped.
+    """
+    try:
+        batch = VerificationBatch.objects.get(pk=batch_id)
+        VerificationBatch.objects.filter(pk=batch_id).update(
+            status='processing', started_at=batch.started_at or timezone.now(), heartbeat_at=timezone.now()
+        )
+        
+        queries = [loaded_query(stored) for stored in batch.queries]
+        
+        chunk_size = settings.VERIFICATION_BATCH_CHUNK_SIZE
+        results = list(batch.results or [])
+        for start in range(len(results), len(queries), chunk_size):
+            results.extend(verify_hashed(queries[start:start + chunk_size]))
+            VerificationBatch.objects.filter(pk=batch_id).update(
+                results=results, processed_queries=len(results), heartbeat_at=timezone.now()
+            )
+        
+        # The stored queries are not needed once the batch is answered
+        VerificationBatch.objects.filter(pk=batch_id).update(
+            status='completed', results=results, queries=[], completed_at=timezone.now()
+        )
+    except Exception as e:
+        logger.exception("Verification batch %s failed", batch_id)
+        VerificationBatch.objects.filter(pk=batch_id).update(
+            status='failed', error_details=[{'error': str(e)}], queries=[], completed_at=timezone.now()
+        )
+    finally:
+        connection.close()
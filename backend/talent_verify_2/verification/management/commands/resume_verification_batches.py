@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from verification.batches import claim_stale_batch, process_batch, stale_batches
+
+class Command(BaseCommand):
+    help = 'Finish verification batches whose background worker stopped, e.g. after a restart'
+
+    def handle(self, *args, **options):
+        resumed = 0
+        for batch_id in list(stale_batches().order_by('created_at').values_list('pk', flat=True)):
+            # Processed here rather than in a thread, which would die with this command
+            if claim_stale_batch(batch_id):
+                process_batch(batch_id)
+                resumed += 1
+        self.stdout.write(self.style.SUCCESS(f'Resumed {resumed} verification batches'))
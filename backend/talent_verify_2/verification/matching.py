@@ -0,0 +1,127 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from companies.versions import company_version
+from employees.models import Employee, EmployeePosition
+
+RESULT_RANK = {'no': 0, 'partial': 1, 'yes': 2}
+
+def verify_employment(queries):
+    """
+    Answer validated VerificationQuerySerializer items, in order.
+
+    Answers are cached under the company's data version, so any write to
+    that company's employees or positions invalidates them.
+    """
+    return verify_hashed([hash_query(query) for query in queries])
+
+def hash_query(query):
+    """
+    A query with the name, employee_id and email replaced by their blind
+    indexes, the only form in which queries are cached or stored.
+    """
+    return {
+        'company': query['company'],
+        'role': query.get('role', ''),
+        'start_date': query['start_date'],
+        'end_date': query['end_date'],
+        **{f'{field}_index': Employee.blind_index(query.get(field)) for field in ('name', 'employee_id', 'email')},
+    }
+
+def verify_hashed(queries):
+    """verify_employment for queries already passed through hash_query"""
+    versions = {company_id: company_version(company_id) for company_id in {query['company'] for query in queries}}
+    keys = [cache_key(query, versions[query['company']]) for query in queries]
+    cached = cache.get_many(keys)
+
+    pending = [index for index, key in enumerate(keys) if key not in cached]
+    if pending:
+        answers = match_queries([queries[index] for index in pending])
+        cache.set_many(
+            {keys[index]: answer for index, answer in zip(pending, answers)},
+            settings.VERIFICATION_CACHE_TTL,
+        )
+        cached.update({keys[index]: answer for index, answer in zip(pending, answers)})
+    return [cached[key] for key in keys]
+
+def cache_key(query, version):
+    parts = [
+        query['company'], query['name_index'], query['employee_id_index'], query['email_index'],
+        query['role'], query['start_date'].isoformat(), query['end_date'].isoformat(),
+    ]
+    return f"verification:{query['company']}:{version}:{Employee.blind_index('|'.join(map(str, parts)))}"
+
+def match_queries(queries):
+    """
+    Answer hashed queries with one blind-index lookup of the candidates and
+    one interval query over their positions, whatever the number of queries.
+    """
+    candidates = {}
+    for row in Employee.objects.filter(
+        company_id__in={query['company'] for query in queries},
+        name_index__in={query['name_index'] for query in queries},
+    ).values('pk', 'company_id', 'name_index', 'employee_id_index', 'email_index'):
+        candidates.setdefault((row['company_id'], row['name_index']), []).append(row)
+
+    positions = {}
+    employee_ids = [row['pk'] for rows in candidates.values() for row in rows]
+    if employee_ids:
+        window_start = min(query['start_date'] for query in queries)
+        window_end = max(query['end_date'] for query in queries)
+        for position in EmployeePosition.objects.filter(
+            Q(end_date__isnull=True) | Q(end_date__gte=window_start),
+            employee_id__in=employee_ids,
+            start_date__lte=window_end,
+        ).order_by('start_date').values('employee_id', 'role', 'department__name', 'start_date', 'end_date'):
+            positions.setdefault(position['employee_id'], []).append(position)
+
+    answers = []
+    for query in queries:
+        best = {'result': 'no', 'matched_periods': []}
+        for row in candidates.get((query['company'], query['name_index']), []):
+            if any(
+                query[f'{field}_index'] and row[f'{field}_index'] != query[f'{field}_index']
+                for field in ('employee_id', 'email')
+            ):
+                continue
+            answer = match_positions(query, positions.get(row['pk'], []))
+            if RESULT_RANK[answer['result']] > RESULT_RANK[best['result']]:
+                best = answer
+        answers.append(best)
+    return answers
+
+def match_positions(query, positions):
+    """Compare one candidate's positions with the queried role and period"""
+    start, end = query['start_date'], query['end_date']
+    role = ' '.join(query.get('role', '').lower().split())
+    periods = []
+    for position in positions:
+        if role and ' '.join(position['role'].lower().split()) != role:
+            continue
+        period_start = max(position['start_date'], start)
+        period_end = min(position['end_date'] or end, end)
+        if period_start <= period_end:
+            periods.append((period_start, period_end, position))
+    if not periods:
+        return {'result': 'no', 'matched_periods': []}
+
+    # Covered if the periods, merged, run from start to end without a gap
+    covered_until = start - timedelta(days=1)
+    for period_start, period_end, _ in periods:
+        if period_start > covered_until + timedelta(days=1):
+            break
+        covered_until = max(covered_until, period_end)
+
+    return {
+        'result': 'yes' if covered_until >= end else 'partial',
+        'matched_periods': [
+            {
+                'role': position['role'],
+                'department': position['department__name'],
+                'start_date': period_start.isoformat(),
+                'end_date': period_end.isoformat(),
+            }
+            for period_start, period_end, position in periods
+        ],
+    }
@@ -0,0 +1,36 @@
+from django.db import models
+from django.utils import timezone
+from users.models import User
+import uuid
+
+class VerificationBatch(models.Model):
+    """A large batch of verification queries answered in the background"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    queries = models.JSONField(default=list)  # Blind-indexed queries, see batches.stored_query; cleared once answered
+    results = models.JSONField(null=True, blank=True)  # One answer per query, in order
+    total_queries = models.PositiveIntegerField(default=0)
+    processed_queries = models.PositiveIntegerField(default=0)
+    error_details = models.JSONField(default=list)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='verification_batches')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    # Moved forward whenever progress is saved; see batches.stale_batches
+    heartbeat_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_by', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Verification batch {self.id} - {self.status} ({self.processed_queries}/{self.total_queries})"
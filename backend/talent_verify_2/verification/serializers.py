@@ -0,0 +1,39 @@
+from datetime import date
+from django.conf import settings
+from rest_framework import serializers
+from .models import VerificationBatch
+
+class VerificationQuerySerializer(serializers.Serializer):
+    """Did the named person work at the company (as the role) over the period?"""
+    company = serializers.IntegerField()
+    name = serializers.CharField(max_length=255)
+    employee_id = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    email = serializers.EmailField(required=False, allow_blank=True)
+    role = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField(required=False)
+    
+    def validate(self, data):
+        data.setdefault('end_date', date.today())
+        if data['end_date'] < data['start_date']:
+            raise serializers.ValidationError({'end_date': 'end_date must not be before start_date'})
+        return data
+
+class VerificationBatchRequestSerializer(serializers.Serializer):
+    queries = VerificationQuerySerializer(many=True, allow_empty=False)
+    
+    def validate_queries(self, value):
+        if len(value) > settings.VERIFICATION_BATCH_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'A batch can hold at most {settings.VERIFICATION_BATCH_MAX_SIZE} queries'
+            )
+        return value
+
+class VerificationBatchSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VerificationBatch
+        fields = [
+            'id', 'status', 'total_queries', 'processed_queries', 'error_details',
+            'created_at', 'started_at', 'completed_at', 'heartbeat_at'
+        ]
+        read_only_fields = fields
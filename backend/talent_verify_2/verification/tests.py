@@ -0,0 +1,203 @@
+import io
+import time
+from datetime import date, timedelta
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from companies.models import Company, Department
+from employees.models import Employee, EmployeePosition
+from users.models import User
+from .batches import stored_query
+from .matching import match_positions, verify_employment
+from .models import VerificationBatch
+
+def create_company():
+    return Company.objects.create(
+        name='ACME',
+        registration_date=date(2020, 1, 1),
+        registration_number='R-1',
+        address='1 Main St',
+        contact_person='Jane',
+        email='hr@acme.test',
+    )
+
+def create_employee(company, name):
+    employee = Employee(company=company)
+    employee.name = name
+    employee.save()
+    return employee
+
+class MatchPositionsTests(SimpleTestCase):
+    """Outcomes of comparing one candidate's positions with a query"""
+
+    QUERY = {'role': 'Developer', 'start_date': date(2021, 1, 1), 'end_date': date(2021, 12, 31)}
+
+    def position(self, role, start_date, end_date=None):
+        return {'role': role, 'department__name': 'Engineering', 'start_date': start_date, 'end_date': end_date}
+
+    def test_adjacent_positions_covering_the_period_match(self):
+        answer = match_positions(self.QUERY, [
+            self.position('developer', date(2020, 6, 1), date(2021, 6, 30)),
+            self.position(' Developer ', date(2021, 7, 1)),
+        ])
+
+        self.assertEqual(answer['result'], 'yes')
+        self.assertEqual(
+            [(period['start_date'], period['end_date']) for period in answer['matched_periods']],
+            [('2021-01-01', '2021-06-30'), ('2021-07-01', '2021-12-31')],
+        )
+
+    def test_gap_in_coverage_is_partial(self):
+        answer = match_positions(self.QUERY, [
+            self.position('Developer', date(2020, 6, 1), date(2021, 3, 31)),
+            self.position('Developer', date(2021, 6, 1)),
+        ])
+
+        self.assertEqual(answer['result'], 'partial')
+        self.assertEqual(len(answer['matched_periods']), 2)
+
+    def test_other_role_or_period_does_not_match(self):
+        answer = match_positions(self.QUERY, [
+            self.position('Designer', date(2020, 1, 1)),
+            self.position('Developer', date(2019, 1, 1), date(2020, 12, 31)),
+        ])
+
+        self.assertEqual(answer, {'result': 'no', 'matched_periods': []})
+
+class VerificationCacheTests(TestCase):
+    """Cached answers are reused until the company's data changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = create_company()
+        cls.department = Department.objects.create(company=cls.company, name='Engineering')
+        cls.employee = create_employee(cls.company, 'Jane Doe')
+
+    def setUp(self):
+        cache.clear()
+        self.query = {
+            'company': self.company.pk,
+            'name': 'jane  doe',
+            'start_date': date(2021, 1, 1),
+            'end_date': date(2021, 12, 31),
+        }
+
+    def test_answer_is_cached_until_a_position_changes(self):
+        self.assertEqual(verify_employment([self.query])[0]['result'], 'no')
+        with self.assertNumQueries(0):
+            self.assertEqual(verify_employment([self.query])[0]['result'], 'no')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            EmployeePosition.objects.create(
+                employee=self.employee, department=self.department, role='Developer', start_date=date(2020, 1, 1),
+            )
+
+        self.assertEqual(verify_employment([self.query])[0]['result'], 'yes')
+
+class VerificationBatchTests(TransactionTestCase):
+    """Batches above the synchronous limit are answered in the background"""
+
+    def setUp(self):
+        company = create_company()
+        department = Department.objects.create(company=company, name='Engineering')
+        employee = create_employee(company, 'Jane Doe')
+        EmployeePosition.objects.create(
+            employee=employee, department=department, role='Developer', start_date=date(2020, 1, 1),
+        )
+        user = User.objects.create_user(username='verifier', email='verifier@acme.test', password='pw-123456!')
+        user.profile.company = company
+        user.profile.save()
+        self.user = user
+
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.queries = [
+            {'company': company.pk, 'name': name, 'start_date': '2021-01-01', 'end_date': '2021-12-31'}
+            for name in ('Jane Doe', 'John Roe', 'JANE DOE')
+        ]
+
+    def wait_for(self, batch_id, timeout=10):
+        deadline = time.monotonic() + timeout
+        batch = VerificationBatch.objects.get(pk=batch_id)
+        while batch.status in ('pending', 'processing') and time.monotonic() < deadline:
+            time.sleep(0.05)
+            batch.refresh_from_db()
+        return batch
+
+    @override_settings(VERIFICATION_BATCH_SYNC_LIMIT=1, VERIFICATION_BATCH_CHUNK_SIZE=2)
+    def test_batch_completes_and_results_download(self):
+        response = self.client.post('/api/verifications/batch/', {'queries': self.queries}, format='json')
+        self.assertEqual(response.status_code, 202)
+
+        batch = self.wait_for(response.data['id'])
+        self.assertEqual(batch.status, 'completed')
+        self.assertEqual(batch.processed_queries, len(self.queries))
+        self.assertEqual(batch.queries, [])
+
+        response = self.client.get(f'/api/verification-batches/{batch.pk}/results/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([answer['result'] for answer in response.json()['results']], ['yes', 'no', 'yes'])
+
+    def test_stored_queries_hold_no_plaintext(self):
+        stored = stored_query({
+            'company': 1, 'name': 'Jane Doe', 'employee_id': 'E-1', 'email': 'jane@acme.test',
+            'role': 'Developer', 'start_date': date(2021, 1, 1), 'end_date': date(2021, 12, 31),
+        })
+
+        self.assertNotIn('Jane Doe', str(stored))
+        self.assertNotIn('jane@acme.test', str(stored))
+        self.assertNotIn('E-1', str(stored))
+        self.assertEqual(stored['name_index'], Employee.blind_index('jane doe'))
+
+    def interrupted_batch(self, **fields):
+        """A batch whose worker died after answering the first query"""
+        queries = [
+            {**query, 'start_date': date(2021, 1, 1), 'end_date': date(2021, 12, 31)}
+            for query in self.queries
+        ]
+        defaults = {
+            'status': 'processing',
+            # A deliberately wrong saved answer shows that it is not recomputed
+            'results': [{'result': 'no', 'matched_periods': []}],
+            'processed_queries': 1,
+            'heartbeat_at': timezone.now() - timedelta(hours=1),
+        }
+        return VerificationBatch.objects.create(
+            queries=[stored_query(query) for query in queries],
+            total_queries=len(queries),
+            created_by=self.user,
+            **{**defaults, **fields},
+        )
+
+    def test_stale_batch_resumes_from_its_last_chunk(self):
+        batch = self.interrupted_batch()
+
+        response = self.client.post(f'/api/verification-batches/{batch.pk}/retry/')
+        self.assertEqual(response.status_code, 202)
+
+        batch = self.wait_for(batch.pk)
+        self.assertEqual(batch.status, 'completed')
+        self.assertEqual([answer['result'] for answer in batch.results], ['no', 'no', 'yes'])
+        self.assertEqual(batch.queries, [])
+
+    def test_only_stale_unfinished_batches_are_resumed(self):
+        active = self.interrupted_batch(heartbeat_at=timezone.now())
+        response = self.client.post(f'/api/verification-batches/{active.pk}/retry/')
+        self.assertEqual(response.status_code, 409)
+
+        finished = self.interrupted_batch(status='completed')
+        response = self.client.post(f'/api/verification-batches/{finished.pk}/retry/')
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_finishes_stale_batches(self):
+        stale = self.interrupted_batch()
+        active = self.interrupted_batch(heartbeat_at=timezone.now())
+
+        call_command('resume_verification_batches', stdout=io.StringIO())
+
+        stale.refresh_from_db()
+        active.refresh_from_db()
+        self.assertEqual(stale.status, 'completed')
+        self.assertEqual(active.status, 'processing')
@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
+from .batches import resume_batch, start_batch
+from .matching import verify_employment
+from .models import VerificationBatch
+from .serializers import VerificationQuerySerializer, VerificationBatchRequestSerializer, VerificationBatchSerializer
+
+def is_verification_admin(user):
+    return user.is_superuser or (user.profile.role is not None and user.profile.role.name == 'talent_verify_admin')
+
+def can_verify(user, company_id):
+    """Talent Verify admins verify against any company, other users against their own"""
+    return is_verification_admin(user) or user.profile.company_id == company_id
+
+class VerificationViewSet(viewsets.ViewSet):
+    """Employment verification against the stored positions"""
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'verification'
+    
+    def create(self, request):
+        """
+        Answer one verification query with yes, partial or no and the
+        matched periods, clipped to the queried dates.
+        """
+        serializer = VerificationQuerySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        query = serializer.validated_data
+        
+        if not can_verify(request.user, query['company']):
+            return Response(
+                {'error': 'You do not have permission to verify employment at this company'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        answer, = verify_employment([query])
+        return Response(answer)
+    
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Answer many queries at once. Up to VERIFICATION_BATCH_SYNC_LIMIT
+        queries are answered in the response; larger batches are saved as a
+        VerificationBatch and answered in the background.
+        """
+        serializer = VerificationBatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        queries = serializer.validated_data['queries']
+        
+        forbidden = [index for index, query in enumerate(queries) if not can_verify(request.user, query['company'])]
+        if forbidden:
+            return Response(
+                {'error': 'You do not have permission to verify employment at these companies', 'queries': forbidden},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        if len(queries) <= settings.VERIFICATION_BATCH_SYNC_LIMIT:
+            return Response({'results': verify_employment(queries)})
+        
+        batch = start_batch(queries, request.user)
+        return Response(VerificationBatchSerializer(batch).data, status=status.HTTP_202_ACCEPTED)
+
+class VerificationBatchViewSet(viewsets.ReadOnlyModelViewSet):
+    """Status and results of background verification batches"""
+    serializer_class = VerificationBatchSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        queryset = VerificationBatch.objects.defer('queries', 'results')
+        if not is_verification_admin(self.request.user):
+            queryset = queryset.filter(created_by=self.request.user)
+        return queryset
+    
+    @action(detail=True, methods=['post'])
+    def retry(self, request, pk=None):
+        """Resume a batch whose background worker stopped, e.g. on a restart"""
+        batch = self.get_object()
+        
+        if batch.status not in ['pending', 'processing']:
+            return Response(
+                {'error': 'Only pending or processing batches can be resumed'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not resume_batch(batch.pk):
+            return Response(
+                {'error': 'Batch is still making progress', 'processed_queries': batch.processed_queries},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        batch.refresh_from_db()
+        return Response(VerificationBatchSerializer(batch).data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['get'])
+    def results(self, request, pk=None):
+        """Download the answers of a completed batch, in query order"""
+        batch = self.get_object()
+        if batch.status != 'completed':
+            return Response(
+                {'error': f'Batch is {batch.status}', 'processed_queries': batch.processed_queries},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        response = JsonResponse({'id': str(batch.id), 'results': batch.results})
+        response['Content-Disposition'] = f'attachment; filename="verification_batch_{batch.id}.json"'
+        return response